@@ -1,66 +1,112 @@
-import threading
 import state
 import uci_utils
-from ai_interface import get_best_move_from_stockfish, get_evaluation_and_move, get_ai_coach_commentary
+import engine
+import background_analysis
+import speculation
+from coach import coach
+from ai_interface import PRIORITY_BOT, SEARCH_DEPTH, is_engine_ready
+from engine_pool import PRIORITY_HINT
+from analysis_scheduler import scheduler
 
 def perform_ai_turn():
     """Fetches move from Stockfish and stores it in pending_ai_move."""
     if state.is_ai_thinking: return
-    
-    fen = uci_utils.generate_fen()
-    print(f"--- AI Turn Started ---")
+
+    # Answered in advance while the human was thinking?
+    spec = speculation.speculator
+    history = state.position.key_history
+    move_uci = spec.take(state.position.zobrist_key, history[-2] if len(history) > 1 else None)
+    if move_uci:
+        print(f"--- Speculation hit: {move_uci} (hit rate {spec.hit_rate():.0%}) ---")
+        state.pending_ai_move = uci_utils.uci_to_grid(move_uci)
+        state.wake_ui()
+        return
+
+    fen = state.position.to_fen()
+    print(f"--- AI Turn Started (speculation hit rate {spec.hit_rate():.0%}) ---")
     state.is_ai_thinking = True
-    
-    def fetch_and_move():
-        try:
-            move_uci = get_best_move_from_stockfish(fen)
-            if move_uci:
-                print(f"--- Stockfish chose: {move_uci} ---")
-                coords = uci_utils.uci_to_grid(move_uci)
-                if coords:
-                    state.pending_ai_move = coords  # Main loop picks this up
-            else:
-                print("--- Stockfish returned no move (Game over?) ---")
-        except Exception as e:
-            print(f"--- AI Turn Error: {e} ---")
-        finally:
-            state.is_ai_thinking = False
+    background_analysis.analyzer.stop()  # The bot move needs the engine
 
-    threading.Thread(target=fetch_and_move, daemon=True).start()
+    def on_result(result, key):
+        move_uci = result['move'] if result else None
+        if move_uci:
+            print(f"--- Stockfish chose: {move_uci} ---")
+            coords = uci_utils.uci_to_grid(move_uci)
+            if coords:
+                state.pending_ai_move = coords  # Main loop picks this up
+                state.wake_ui()
+        else:
+            print("--- Stockfish returned no move (Game over?) ---")
+
+    def on_done():
+        state.is_ai_thinking = False
+
+    scheduler.submit('bot', state.position.zobrist_key, fen, on_result, PRIORITY_BOT, on_done)
 
 def get_ai_hint():
     """Asks for a hint and updates the coach message."""
     if state.is_ai_thinking: return
     
-    fen = uci_utils.generate_fen()
+    fen = state.position.to_fen()
     print(f"--- Requesting Hint ---")
     state.is_ai_thinking = True
-    
-    def fetch_hint():
+
+    def on_result(result, key):
         try:
-            move, eval_val = get_evaluation_and_move(fen)
-            state.ai_eval_score = eval_val if eval_val else "?"
+            if result is None:
+                if is_engine_ready():
+                    state.ai_coach_message = "The engine hit an error. Try the hint again."
+                else:
+                    state.ai_eval_score = "Engine Off"
+                    state.ai_coach_message = "No clear best move found."
+                return
+            move, eval_val = result['move'], result['eval']
+            state.ai_eval_score = eval_val
             if move:
                 state.last_hint_move = move   # Store raw UCI for bottom bar
                 # Format as e2-e4 for sidebar
                 move_fmt = f"{move[0]}{move[1]}-{move[2]}{move[3]}" if len(move) >= 4 else move
-                print(f"--- Best Move: {move_fmt}  |  Eval: {eval_val} ---")
-                state.ai_coach_message = f"Best move is {move_fmt.upper()}. Analyzing..."
-                get_ai_coach_commentary(fen, move, eval_val, update_coach_text)
+                print(f"--- Best Move: {move_fmt}  |  Eval: {eval_val}  |  Depth: {result['depth']}  |  PV: {' '.join(result['pv'][:6])} ---")
+                print(f"--- Coach metrics: {coach.metrics()} ---")
+                # Local explanation now; the LLM's replaces it if it arrives within budget
+                coach.request(fen, result, update_coach_text, stream_coach_text)
             else:
                 state.ai_coach_message = "No clear best move found."
         except Exception as e:
             print(f"--- Hint Logic Error: {e} ---")
             state.ai_coach_message = "Coach had an error."
         finally:
-            state.is_ai_thinking = False
+            state.wake_ui()
+
+    # Answer straight from background analysis if it has already searched deep enough
+    key = state.position.zobrist_key
+    pondered = background_analysis.analyzer.latest(key)
+    if pondered and pondered['depth'] >= SEARCH_DEPTH:
+        on_result(pondered, key)
+        state.is_ai_thinking = False
+        return
+
+    def on_done():
+        state.is_ai_thinking = False
+        # Resume pondering on the same position once the hint search is done
+        if key == state.position.zobrist_key:
+            engine.refresh_analysis()
+
+    background_analysis.analyzer.stop()  # Frees its engine; its depth so far lands in the cache
+    scheduler.submit('hint', key, fen, on_result, PRIORITY_HINT, on_done)
 
-    threading.Thread(target=fetch_hint, daemon=True).start()
+def stream_coach_text(partial):
+    """Shows coach commentary while it is still streaming in."""
+    state.ai_coach_streaming = True
+    state.ai_coach_message = partial
+    state.wake_ui()
 
 def update_coach_text(text):
     """Callback to update coach message with LLM commentary + move notation."""
+    state.ai_coach_streaming = False
     if state.last_hint_move and len(state.last_hint_move) >= 4:
         move_fmt = f"{state.last_hint_move[0]}{state.last_hint_move[1]}-{state.last_hint_move[2]}{state.last_hint_move[3]}".upper()
         state.ai_coach_message = f"{text}\n\nBest Move: {move_fmt}"
     else:
         state.ai_coach_message = text
+    state.wake_ui()
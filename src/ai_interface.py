@@ -1,87 +1,340 @@
 import os
 import threading
 import logging
-from stockfish import Stockfish
-import google.generativeai as genai
-from dotenv import load_dotenv
+import result_cache
+import engine_pool
+from engine_pool import PRIORITY_BOT, PRIORITY_EVAL
 
-load_dotenv()
+# The engine bridge and coach are optional: without these packages the
+# game still runs (headless or not), just without an engine or a coach.
+try:
+    from stockfish import Stockfish
+except ImportError:
+    Stockfish = None
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Thread Lock for Stockfish (Mandatory to prevent engine crashes)
-engine_lock = threading.Lock()
-
-# Initialize Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-# Try to find a working model
-try:
-    # Use gemini-1.5-flash as default, but allow easy fallback
-    model_name = 'gemini-3-flash-preview' 
-    model = genai.GenerativeModel(model_name)
-    print(f"--- Gemini loaded with model: {model_name} ---")
-except Exception as e:
-    logger.error(f"Gemini model load error: {e}")
-    print(f"--- Gemini model {model_name} error, trying fallback... ---")
-    model = genai.GenerativeModel('gemini-pro')
+# Initialize Gemini (COACH_BACKEND=fake swaps in a local streaming stand-in)
+model = None
+if os.getenv("COACH_BACKEND", "gemini").lower() == "fake":
+    import fake_coach
+    model = fake_coach.FakeCoachModel()
+    print("--- Coach using the local fake backend ---")
+elif genai is None:
+    print("--- google-generativeai not installed; coach uses local explanations only ---")
+else:
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    try:
+        # Use gemini-1.5-flash as default, but allow easy fallback
+        model_name = 'gemini-3-flash-preview' 
+        model = genai.GenerativeModel(model_name)
+        print(f"--- Gemini loaded with model: {model_name} ---")
+    except Exception as e:
+        logger.error(f"Gemini model load error: {e}")
+        print(f"--- Gemini model {model_name} error, trying fallback... ---")
+        model = genai.GenerativeModel('gemini-pro')
 
 AI_STATUS = "Initializing..."
+status_listener = None  # Called after AI_STATUS changes during play (the GUI wakes its loop)
 
-# Initialize Stockfish (Global instance for efficiency)
+def set_status(text):
+    global AI_STATUS
+    AI_STATUS = text
+    if status_listener:
+        status_listener()
+
+# Initialize Stockfish (a pool of processes; each request borrows one)
 stockfish_path = os.getenv("STOCKFISH_PATH")
-engine = None
+SEARCH_DEPTH = int(os.getenv("STOCKFISH_DEPTH", "15"))
+
+def _create_engine(threads):
+    eng = Stockfish(path=stockfish_path, depth=SEARCH_DEPTH, parameters={"Threads": threads})
+    eng.set_skill_level(20) # Max skill
+    return eng
+
+engines = None
 try:
-    if stockfish_path and os.path.exists(stockfish_path):
-        engine = Stockfish(path=stockfish_path)
-        engine.set_skill_level(20) # Max skill
+    if Stockfish is None:
+        AI_STATUS = "Engine Not Installed"
+        print("--- stockfish package not installed; engine disabled ---")
+    elif stockfish_path and os.path.exists(stockfish_path):
+        pool_size = engine_pool.default_pool_size()
+        # Split the cores between the engines in the pool
+        threads_per_engine = max(1, (os.cpu_count() or 1) // pool_size)
+        engines = engine_pool.EnginePool(lambda: _create_engine(threads_per_engine), pool_size)
         AI_STATUS = "Ready"
-        print(f"--- Stockfish initialized successfully ---")
+        print(f"--- Stockfish pool initialized: {pool_size} engines x {threads_per_engine} threads ---")
     else:
         AI_STATUS = "Engine Path Error"
         print(f"--- Stockfish path not found: {stockfish_path} ---")
 except Exception as e:
     AI_STATUS = f"Engine Error: {str(e)[:20]}"
     print(f"--- Error initializing Stockfish: {e} ---")
-    engine = None
+    engines = None
+
+# --- Engine Result Cache ---
+# Memory LRU for the session, plus an optional SQLite file (ENGINE_CACHE_PATH)
+# shared across runs. A result searched to depth D answers any request <= D.
+engine_cache = result_cache.TieredCache(
+    'engine_searches',
+    capacity=int(os.getenv("ENGINE_CACHE_SIZE", "4096")),
+    db_path=os.getenv("ENGINE_CACHE_PATH"),
+)
+
+def _engine_cache_key(fen):
+    """Position (FEN without move counters) plus the kind of search limit."""
+    return ' '.join(fen.split()[:4]) + '|depth'
+
+def lookup_engine_result(fen, depth=SEARCH_DEPTH):
+    """Returns a cached analyse_position() result at least as deep as requested, or None."""
+    entry = engine_cache.get(_engine_cache_key(fen))
+    if entry and entry['limit'] >= depth:
+        return entry
+    return None
+
+def store_engine_result(fen, result):
+    """Caches a search result, never replacing a deeper entry with a shallower one."""
+    key = _engine_cache_key(fen)
+    old = engine_cache.peek(key)
+    if old and old['limit'] > result['limit']:
+        return
+    engine_cache.put(key, result)
 
 def is_engine_ready():
-    return engine is not None
+    return engines is not None
 
-def get_best_move_from_stockfish(fen):
-    """Asks Stockfish for the best move in UCI format (e.g., 'e2e4')."""
-    global AI_STATUS
-    if not engine:
+# --- UCI Search ---
+def format_score(score):
+    """Formats a White-perspective {'type', 'value'} score, e.g. '+0.35' or 'Mate in 3'."""
+    if score is None:
+        return "?"
+    val = score['value']
+    if score['type'] == 'cp':
+        return f"{val / 100.0:+}"
+    return f"Mate in {abs(val)}" if val > 0 else f"Mate in -{abs(val)}"
+
+def parse_info_line(line):
+    """Parses a UCI 'info' line into a dict; the score stays side-to-move relative."""
+    tokens = line.split()
+    info = {}
+    i = 1
+    while i < len(tokens):
+        tok = tokens[i]
+        if tok in ('depth', 'seldepth', 'multipv', 'nodes', 'nps', 'time') and i + 1 < len(tokens):
+            info[tok] = int(tokens[i + 1])
+            i += 2
+        elif tok == 'score' and i + 2 < len(tokens):
+            info['score'] = {'type': tokens[i + 1], 'value': int(tokens[i + 2])}
+            i += 3
+            if i < len(tokens) and tokens[i] in ('lowerbound', 'upperbound'):
+                info['bound'] = tokens[i]
+                i += 1
+        elif tok == 'pv':
+            info['pv'] = tokens[i + 1:]
+            break
+        elif tok == 'string':
+            break
+        else:
+            i += 1
+    return info
+
+def white_score(score, fen):
+    """Converts a side-to-move score into White's perspective."""
+    parts = fen.split(' ')
+    if len(parts) > 1 and parts[1] == 'b':
+        return {'type': score['type'], 'value': -score['value']}
+    return dict(score)
+
+def send_stop(engine):
+    """
+    Writes UCI 'stop' straight to the engine's stdin. The wrapper's _put()
+    first does an isready/readyok round trip, reading and discarding output
+    until 'readyok', which would swallow the 'bestmove' the search loop (or
+    another thread) is waiting for.
+    """
+    engine._stockfish.stdin.write("stop\n")
+    engine._stockfish.stdin.flush()
+
+def _search(engine, fen, depth, should_stop=None, multipv=1):
+    """
+    Runs one 'go depth N' and collects everything from its info lines:
+    best move, White-perspective score, depth, nodes, nps and PV.
+    If should_stop() turns true mid-search, sends 'stop' and marks the
+    result as stopped (partial results are not cached). The result also has
+    'lines': one {'move', 'score', 'eval', 'depth', 'pv'} per principal
+    variation, best first (just one unless multipv > 1).
+    """
+    engine.set_fen_position(fen)
+    # The wrapper has no streaming API, so talk UCI through its line I/O
+    if multipv != 1:
+        engine._put(f"setoption name MultiPV value {multipv}")
+    engine._put(f"go depth {depth}")
+    result = {'move': None, 'score': None, 'depth': 0, 'nodes': 0, 'nps': 0, 'pv': [], 'stopped': False}
+    lines = {}
+    while True:
+        if should_stop and not result['stopped'] and should_stop():
+            # Keep reading afterwards: 'bestmove' always follows (or is already buffered)
+            send_stop(engine)
+            result['stopped'] = True
+        line = engine._read_line()
+        if line.startswith('bestmove'):
+            parts = line.split()
+            if len(parts) > 1 and parts[1] != '(none)':
+                result['move'] = parts[1]
+            break
+        if not line.startswith('info') or ' score ' not in line:
+            continue
+        info = parse_info_line(line)
+        if 'bound' in info:
+            continue
+        rank = info.get('multipv', 1)
+        score = white_score(info['score'], fen)
+        if info.get('pv'):
+            lines[rank] = {'move': info['pv'][0], 'score': score, 'eval': format_score(score),
+                           'depth': info.get('depth', 0), 'pv': info['pv']}
+        if rank != 1:
+            continue
+        result['score'] = score
+        result['depth'] = info.get('depth', result['depth'])
+        result['nodes'] = info.get('nodes', result['nodes'])
+        result['nps'] = info.get('nps', result['nps'])
+        result['pv'] = info.get('pv', result['pv'])
+    if multipv != 1:
+        engine._put("setoption name MultiPV value 1")
+    result['lines'] = [lines[rank] for rank in sorted(lines)]
+    result['limit'] = depth  # Requested depth; what the cache compares against
+    result['eval'] = format_score(result['score'])
+    return result
+
+def analyse_position(fen, priority=PRIORITY_EVAL, depth=SEARCH_DEPTH, should_stop=None):
+    """
+    One search returning {'move', 'score', 'eval', 'depth', 'nodes', 'nps', 'pv'}.
+    'score' is {'type': 'cp'|'mate', 'value': int} from White's side and
+    'eval' is its display string. Returns None if no engine is available.
+    should_stop is polled while searching to abandon superseded requests.
+    """
+    cached = lookup_engine_result(fen, depth)
+    if cached:
+        return cached
+    if not engines:
         return None
-    with engine_lock:
+    with engines.engine(priority) as engine:
+        if should_stop and should_stop():
+            return None  # Superseded while waiting for an engine
         try:
-            old_status = AI_STATUS
-            AI_STATUS = "Thinking..."
-            logger.info(f"Engine Move Request: {fen}")
-            engine.set_fen_position(fen)
-            move = engine.get_best_move()
-            logger.info(f"Engine Best Move: {move}")
-            AI_STATUS = old_status
-            return move
+            set_status("Thinking..." if priority == PRIORITY_BOT else "Evaluating...")
+            logger.info(f"Engine Search Request: {fen}")
+            result = _search(engine, fen, depth, should_stop)
+            logger.info(f"Engine Result: {result['move']} {result['eval']} depth {result['depth']}")
+            if not result['stopped']:
+                store_engine_result(fen, result)
+            set_status("Ready")
+            return result
         except Exception as e:
-            AI_STATUS = "Engine Error"
-            logger.error(f"Stockfish Move Error: {e}")
+            set_status("Engine Error")
+            logger.error(f"Stockfish Search Error: {e}")
             return None
 
-def get_ai_coach_commentary(fen, best_move, evaluation, callback):
+def analyse_multipv(fen, count, depth=SEARCH_DEPTH, priority=PRIORITY_EVAL, should_stop=None):
+    """
+    The count best moves for the side to move, as a list of
+    {'move', 'score', 'eval', 'depth', 'pv'} (best first). Not cached.
+    Returns [] if no engine is available or the search was stopped.
+    """
+    if not engines:
+        return []
+    with engines.engine(priority) as engine:
+        if should_stop and should_stop():
+            return []
+        try:
+            result = _search(engine, fen, depth, should_stop, multipv=count)
+            return [] if result['stopped'] else result['lines']
+        except Exception as e:
+            logger.error(f"Stockfish MultiPV Error: {e}")
+            return []
+
+def get_best_move_from_stockfish(fen, priority=PRIORITY_BOT):
+    """Asks Stockfish for the best move in UCI format (e.g., 'e2e4')."""
+    result = analyse_position(fen, priority)
+    return result['move'] if result else None
+
+# --- Coach Commentary Cache ---
+# Same position, same best move and a similar eval get the same explanation,
+# so repeated openings never reach Gemini twice.
+coach_cache = result_cache.TieredCache(
+    'coach_commentary',
+    capacity=int(os.getenv("COACH_CACHE_SIZE", "512")),
+    db_path=os.getenv("COACH_CACHE_PATH"),
+    max_disk_entries=int(os.getenv("COACH_CACHE_MAX_DISK", "20000")),
+)
+_coach_inflight = {}   # cache key -> (callback, on_partial) pairs waiting on the same Gemini call
+_coach_lock = threading.Lock()
+
+def eval_bucket(evaluation):
+    """Coarse eval class for cache keys: half-pawn steps, capped at +/-5, or mate."""
+    if evaluation.startswith("Mate"):
+        return "mate-" if "-" in evaluation else "mate+"
+    try:
+        pawns = float(evaluation)
+    except ValueError:
+        return evaluation
+    return str(max(-10, min(10, round(pawns * 2))))
+
+def _coach_cache_key(fen, best_move, evaluation):
+    return f"{' '.join(fen.split()[:4])}|{best_move}|{eval_bucket(evaluation)}"
+
+def get_ai_coach_commentary(fen, best_move, evaluation, callback, on_partial=None):
     """
     Non-blocking thread to fetch natural language commentary from Gemini.
-    Calls 'callback(commentary)' when finished.
+    Calls 'callback(commentary)' when finished, or 'callback(None)' if the
+    coach is unavailable or fails. With on_partial, the answer
+    is streamed and 'on_partial(text_so_far)' is called as chunks arrive.
+    Answers come from the commentary cache when possible, and identical
+    requests already in flight share one Gemini call.
     """
-    global AI_STATUS
     if not model:
-        callback("Coach is unavailable (Model Init Failed)")
+        logger.error("Coach is unavailable (Model Init Failed)")
+        callback(None)
         return
 
+    key = _coach_cache_key(fen, best_move, evaluation)
+    cached = coach_cache.get(key)
+    if cached:
+        callback(cached)
+        return
+    with _coach_lock:
+        waiting = _coach_inflight.get(key)
+        if waiting is not None:
+            waiting.append((callback, on_partial))
+            return
+        _coach_inflight[key] = [(callback, on_partial)]
+        streaming = on_partial is not None
+
+    def deliver_partial(text):
+        with _coach_lock:
+            waiters = list(_coach_inflight.get(key, []))
+        for _, partial in waiters:
+            if partial:
+                partial(text)
+
+    def deliver(text):
+        with _coach_lock:
+            waiters = _coach_inflight.pop(key, [])
+        for cb, _ in waiters:
+            cb(text)
+
     def run():
-        global AI_STATUS
         prompt = f"""
         You are a Grandmaster Chess Coach. 
         Current Board (FEN): {fen}
@@ -92,50 +345,31 @@ def get_ai_coach_commentary(fen, best_move, evaluation, callback):
         what the strategic goal is. Speak like a helpful mentor.
         """
         try:
-            AI_STATUS = "Coach thinking..."
-            response = model.generate_content(prompt)
-            callback(response.text.strip())
-            AI_STATUS = "Ready"
+            set_status("Coach thinking...")
+            if streaming:
+                text = ""
+                for chunk in model.generate_content(prompt, stream=True):
+                    text += chunk.text
+                    deliver_partial(text.strip())
+                text = text.strip()
+            else:
+                text = model.generate_content(prompt).text.strip()
+            coach_cache.put(key, text)
+            deliver(text)
+            set_status("Ready")
         except Exception as e:
-            AI_STATUS = "Coach Error"
+            set_status("Coach Error")
             logger.error(f"Gemini Error: {e}")
             print(f"--- Gemini Conversation Error: {e} ---")
-            callback(f"Coach had an error (See console)")
+            deliver(None)
 
     threading.Thread(target=run).start()
 
-def get_evaluation_and_move(fen):
+def get_evaluation_and_move(fen, priority=PRIORITY_EVAL):
     """Returns (best_move, evaluation_score). Perspective is always WHITE."""
-    global AI_STATUS
-    if not engine:
+    if not engines and not lookup_engine_result(fen):
         return None, "Engine Off"
-    with engine_lock:
-        try:
-            AI_STATUS = "Evaluating..."
-            engine.set_fen_position(fen)
-            move = engine.get_best_move()
-            eval_data = engine.get_evaluation()
-            
-            # Safe split for FEN
-            parts = fen.split(' ')
-            is_white_turn = parts[1] == 'w' if len(parts) > 1 else True
-            
-            if eval_data['type'] == 'cp':
-                val = eval_data['value']
-                if not is_white_turn:
-                    val = -val
-                score = val / 100.0
-                eval_str = f"{score:+}"
-            else:
-                # Mate
-                val = eval_data['value']
-                if not is_white_turn:
-                    val = -val
-                eval_str = f"Mate in {abs(val)}" if val > 0 else f"Mate in -{abs(val)}"
-                
-            AI_STATUS = "Ready"
-            return move, eval_str
-        except Exception as e:
-            AI_STATUS = "Eval Error"
-            logger.error(f"Stockfish Eval Error: {e}")
-            return None, "Error"
+    result = analyse_position(fen, priority)
+    if result is None:
+        return None, "Error"
+    return result['move'], result['eval']
@@ -0,0 +1,101 @@
+"""
+Latest-wins scheduling of engine analysis.
+
+Each purpose ('eval', 'hint', 'bot') has one worker thread and at most one
+pending request. A newer request replaces the pending one, and a running
+search for a position that is no longer current is told to stop. Every
+result carries the Zobrist key of the position it was computed for and is
+only delivered while that position is still the one on the board.
+"""
+import threading
+
+import state
+from ai_interface import analyse_position, PRIORITY_EVAL
+
+class AnalysisRequest:
+    def __init__(self, purpose, key, fen, on_result, priority, on_done=None):
+        self.purpose = purpose
+        self.key = key
+        self.fen = fen
+        self.on_result = on_result
+        self.priority = priority
+        self.on_done = on_done
+        self.superseded = False
+
+class AnalysisScheduler:
+    def __init__(self, current_key):
+        self.current_key = current_key
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._running = {}
+        self._wakeups = {}
+
+    def submit(self, purpose, key, fen, on_result, priority=PRIORITY_EVAL, on_done=None):
+        """
+        Queues analysis of fen for purpose. on_result(result, key) is called
+        only if the position is still current when the search finishes
+        (result is None when no engine is available or the search failed;
+        ai_interface.is_engine_ready() tells the two apart); on_done() is
+        always called once the request is finished or dropped.
+        """
+        request = AnalysisRequest(purpose, key, fen, on_result, priority, on_done)
+        with self._lock:
+            replaced = self._pending.get(purpose)
+            self._pending[purpose] = request
+            if replaced is not None:
+                replaced.superseded = True
+            running = self._running.get(purpose)
+            if running is not None and running.key != key:
+                running.superseded = True
+            wakeup = self._wakeups.get(purpose)
+            if wakeup is None:
+                wakeup = self._wakeups[purpose] = threading.Event()
+                threading.Thread(target=self._worker, args=(purpose, wakeup), daemon=True).start()
+        if replaced is not None:
+            self._finish(replaced, None)
+        wakeup.set()
+        return request
+
+    def is_current(self, request):
+        return not request.superseded and request.key == self.current_key()
+
+    def _worker(self, purpose, wakeup):
+        while True:
+            wakeup.wait()
+            with self._lock:
+                wakeup.clear()
+                request = self._pending.pop(purpose, None)
+                if request is None:
+                    continue
+                self._running[purpose] = request
+            result = None
+            try:
+                if self.is_current(request):
+                    result = analyse_position(request.fen, request.priority,
+                                              should_stop=lambda: not self.is_current(request))
+            except Exception as e:
+                # Reported as a failed search; the worker must live on for the next request
+                print(f"--- Analysis error ({purpose}): {e} ---")
+            finally:
+                with self._lock:
+                    self._running.pop(purpose, None)
+                self._finish(request, result)
+
+    def _finish(self, request, result):
+        try:
+            # result is None without an engine or after an error; callers still hear about it
+            stopped = result is not None and result.get('stopped')
+            if not stopped and self.is_current(request):
+                request.on_result(result, request.key)
+            else:
+                self.dropped += 1
+        except Exception as e:
+            # Keep the worker alive; a failing callback must not stall its purpose
+            print(f"--- Analysis callback error ({request.purpose}): {e} ---")
+        finally:
+            if request.on_done:
+                request.on_done()
+
+# Shared scheduler for the live game
+scheduler = AnalysisScheduler(current_key=lambda: state.position.zobrist_key)
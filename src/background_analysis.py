@@ -0,0 +1,118 @@
+"""
+Continuous background analysis ("pondering") while a human is to move.
+
+Runs 'go infinite' on the current position, keeps the latest complete
+info line, and pushes the score and best move into state at a throttled
+rate. It is stopped as soon as a move is made; whatever depth it reached
+is stored in the engine cache so a hint can be answered from it.
+"""
+import os
+import threading
+import time
+
+import state
+import ai_interface
+from ai_interface import parse_info_line, white_score, format_score, store_engine_result, PRIORITY_EVAL
+
+UPDATE_INTERVAL = float(os.getenv("PONDER_UPDATE_INTERVAL", "0.25"))  # seconds between UI pushes
+
+class _PonderSession:
+    def __init__(self, fen, key):
+        self.fen = fen
+        self.key = key
+        self.result = None
+        self.engine = None
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def stop(self):
+        with self.lock:
+            if self.stopped:
+                return
+            self.stopped = True
+            engine = self.engine
+        if engine is not None:
+            # Only the _run thread reads the pipe; it wakes up with 'bestmove' right away
+            try:
+                ai_interface.send_stop(engine)
+            except (OSError, ValueError) as e:
+                print(f"--- Could not stop pondering: {e} ---")
+
+class BackgroundAnalyzer:
+    def __init__(self, update_interval=UPDATE_INTERVAL):
+        self.update_interval = update_interval
+        self._session = None
+        self._lock = threading.Lock()
+
+    def start(self, fen, key):
+        """Starts pondering fen (replacing any current session). False if there is no engine."""
+        self.stop()
+        if not ai_interface.engines:
+            return False
+        session = _PonderSession(fen, key)
+        with self._lock:
+            self._session = session
+        threading.Thread(target=self._run, args=(session,), daemon=True).start()
+        return True
+
+    def stop(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session:
+            session.stop()
+
+    def latest(self, key):
+        """Latest result for the position with this key, or None."""
+        with self._lock:
+            session = self._session
+        if session and session.key == key and session.result:
+            return dict(session.result)
+        return None
+
+    def _run(self, session):
+        engines = ai_interface.engines
+        engine = engines.checkout(PRIORITY_EVAL)
+        try:
+            with session.lock:
+                if session.stopped:
+                    return
+                session.engine = engine
+                engine.set_fen_position(session.fen)
+                engine._put("go infinite")
+            last_push = 0.0
+            while True:
+                line = engine._read_line()
+                if line.startswith('bestmove'):
+                    break
+                if not line.startswith('info') or ' score ' not in line:
+                    continue
+                info = parse_info_line(line)
+                if info.get('multipv', 1) != 1 or 'bound' in info or not info.get('pv'):
+                    continue
+                score = white_score(info['score'], session.fen)
+                session.result = {
+                    'move': info['pv'][0], 'score': score, 'eval': format_score(score),
+                    'depth': info.get('depth', 0), 'nodes': info.get('nodes', 0),
+                    'nps': info.get('nps', 0), 'pv': info['pv'], 'stopped': False,
+                }
+                now = time.monotonic()
+                if now - last_push >= self.update_interval and not session.stopped:
+                    last_push = now
+                    self._publish(session)
+        finally:
+            if session.result:
+                result = dict(session.result, limit=session.result['depth'])
+                store_engine_result(session.fen, result)
+            engines.release(engine)
+
+    def _publish(self, session):
+        if session.key != state.position.zobrist_key:
+            return
+        state.ai_eval_score = session.result['eval']
+        state.last_hint_move = session.result['move']
+        state.wake_ui()
+
+analyzer = BackgroundAnalyzer()
+
+def is_human_turn():
+    return not (state.ai_opponent_enabled and state.position.turn == 'black')
@@ -0,0 +1,154 @@
+"""
+Micro-benchmark for square-attack queries.
+
+Compares the original list-based is_cell_attacked (generate every enemy
+piece's raw moves, then test membership) with move_physics.is_cell_attacked
+on a Position (the path the game uses, with its cached bitboard snapshot),
+the bare reverse-ray query and the one-pass attacked-square set.
+
+Usage:
+    python src/bench_attacks.py [--repeat N]
+"""
+import argparse
+import time
+
+import bitboard
+import move_physics
+from position import Position
+
+POSITIONS = {
+    'start':      'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'kiwipete':   'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    'middlegame': 'r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP2BPPP/R2QKB1R w KQ - 0 1',
+    'endgame':    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+}
+
+class _Piece:
+    __slots__ = ('color', 'type', 'has_moved')
+
+    def __init__(self, color, type_name):
+        self.color = color
+        self.type = type_name
+        self.has_moved = False
+
+def board_from_fen(fen):
+    """Builds a position.board-style grid of lightweight piece records."""
+    board = [[None] * 8 for _ in range(8)]
+    for r, rank in enumerate(fen.split()[0].split('/')):
+        c = 0
+        for ch in rank:
+            if ch.isdigit():
+                c += int(ch)
+                continue
+            color = 'white' if ch.isupper() else 'black'
+            board[r][c] = _Piece(color, bitboard.PIECE_NAMES[bitboard.FEN_PIECES.index(ch.lower())])
+            c += 1
+    return board
+
+# --- Reference: the original list-based implementation ---
+def legacy_raw_moves(board, piece, row, col):
+    moves = []
+    if piece.type == 'pawn':
+        move_dir = -1 if piece.color == 'white' else 1
+        if 0 <= row + move_dir < 8 and board[row + move_dir][col] is None:
+            moves.append((row + move_dir, col))
+            start_row = 6 if piece.color == 'white' else 1
+            if row == start_row and board[row + 2 * move_dir][col] is None:
+                moves.append((row + 2 * move_dir, col))
+        for direction_col in [-1, 1]:
+            targeted_row, targeted_col = row + move_dir, col + direction_col
+            if 0 <= targeted_row < 8 and 0 <= targeted_col < 8:
+                target = board[targeted_row][targeted_col]
+                if target and target.color != piece.color:
+                    moves.append((targeted_row, targeted_col))
+        return moves
+
+    is_sliding = piece.type in ['rook', 'bishop', 'queen']
+    directions = []
+    if piece.type in ['rook', 'queen']:
+        directions += [(1,0), (-1,0), (0,1), (0,-1)]
+    if piece.type in ['bishop', 'queen']:
+        directions += [(1,1), (1,-1), (-1,1), (-1,-1)]
+    if piece.type == 'knight':
+        directions = [(2,1), (2,-1), (-2,1), (-2,-1), (1,2), (1,-2), (-1,2), (-1,-2)]
+    if piece.type == 'king':
+        directions = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
+
+    for direction_row, direction_col in directions:
+        curr_r, curr_c = row + direction_row, col + direction_col
+        while 0 <= curr_r < 8 and 0 <= curr_c < 8:
+            blocking_p = board[curr_r][curr_c]
+            if blocking_p is None or blocking_p.color != piece.color:
+                moves.append((curr_r, curr_c))
+            if not is_sliding or blocking_p:
+                break
+            curr_r += direction_row
+            curr_c += direction_col
+    return moves
+
+def legacy_is_cell_attacked(board, target_row, target_col, defender_color):
+    opponent_color = 'black' if defender_color == 'white' else 'white'
+    for r in range(8):
+        for c in range(8):
+            piece = board[r][c]
+            if piece and piece.color == opponent_color:
+                if (target_row, target_col) in legacy_raw_moves(board, piece, r, c):
+                    return True
+    return False
+
+# --- Timed workloads: every square, both colours ---
+def run_legacy(board):
+    hits = 0
+    for r in range(8):
+        for c in range(8):
+            for color in ('white', 'black'):
+                hits += legacy_is_cell_attacked(board, r, c, color)
+    return hits
+
+def run_reverse_ray(board):
+    pos = bitboard.BitboardPosition.from_board(board, 'white')
+    hits = 0
+    for sq in range(64):
+        for by_color in (bitboard.BLACK, bitboard.WHITE):
+            hits += pos.is_square_attacked(sq, by_color)
+    return hits
+
+def run_adapter(board):
+    # What callers pay: one snapshot per position, then a reverse-ray query per call
+    position = Position(board)
+    hits = 0
+    for r in range(8):
+        for c in range(8):
+            for color in ('white', 'black'):
+                hits += move_physics.is_cell_attacked(position, r, c, color)
+    return hits
+
+def run_batch(board):
+    pos = bitboard.BitboardPosition.from_board(board, 'white')
+    return bin(pos.attacks_by(bitboard.BLACK)).count('1') + bin(pos.attacks_by(bitboard.WHITE)).count('1')
+
+def best_time(fn, board, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(board)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'position':<12}{'legacy':>12}{'adapter':>12}{'speedup':>10}{'reverse-ray':>14}{'batch':>12}")
+    for name, fen in POSITIONS.items():
+        board = board_from_fen(fen)
+        legacy = best_time(run_legacy, board, args.repeat)
+        adapter = best_time(run_adapter, board, args.repeat)
+        ray = best_time(run_reverse_ray, board, args.repeat)
+        batch = best_time(run_batch, board, args.repeat)
+        print(f"{name:<12}{legacy * 1e3:>10.2f}ms{adapter * 1e3:>10.2f}ms{legacy / adapter:>9.1f}x"
+              f"{ray * 1e3:>12.2f}ms{batch * 1e6:>10.1f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Rendering benchmark for ui_renderer, runnable without a display.
+
+Plays scripted scenes (the opening, a busy middlegame, a long move log, a
+long streaming coach message) into the GUI state and times every draw_*
+function and whole frames under SDL's dummy video driver. Reports p50,
+p95 and p99 per scene, and can save the numbers as a JSON baseline or
+compare a run against one.
+
+Usage:
+    python src/bench_render.py                                  # print timings
+    python src/bench_render.py --save render_baseline.json      # record a baseline
+    python src/bench_render.py --compare render_baseline.json   # exit 1 on regressions
+    python src/bench_render.py --cold                           # no font or board layer caches
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import constants
+import state
+import fonts
+import sprites
+from game_session import GameSession
+
+# A Ruy Lopez that reaches a crowded middlegame, with white to move
+MIDDLEGAME = ('e2e4 e7e5 g1f3 b8c6 f1b5 a7a6 b5a4 g8f6 e1g1 f8e7 f1e1 b7b5 a4b3 d7d6 '
+              'c2c3 e8g8 h2h3 c6a5 b3c2 c7c5 d2d4 d8c7 b1d2 c5d4 c3d4 a5c6').split()
+OPENING = 'e2e4 e7e5 g1f3'.split()
+WARMUP = 10    # Untimed calls before each measurement
+LONG_LOG = 240  # Entries in the long move log scene
+COACH_TEXT = ("The knight jump to d5 centralises a piece the opponent cannot easily challenge, "
+              "and it eyes both the weak square on f6 and the queen on c7. ")
+DRAW_FUNCTIONS = ('draw_topbar', 'draw_chess_board', 'draw_all_pieces', 'draw_bottom_bar',
+                  'draw_sidebar', 'draw_history_panel')
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def log_entry(ply, uci):
+    color_name = "White" if ply % 2 == 0 else "Black"
+    return f"Move {ply // 2 + 1} {color_name}: {uci[:2].upper()} - {uci[2:4].upper()}"
+
+def play(moves):
+    """Resets the GUI state to the position after the UCI moves."""
+    session = GameSession('bench')
+    for uci in moves:
+        session.play(uci)
+    state.position = session.position
+    state.game_move_log = [log_entry(i, uci) for i, uci in enumerate(moves)]
+    state.active_selected_piece = None
+    state.active_selected_pos = None
+    state.legal_moves_for_selected = []
+    state.ai_coach_message = "I am your coach. Make a move or click 'Hint'!"
+    state.ai_coach_streaming = False
+    state.last_hint_move = ""
+    state.ai_eval_score = "0.0"
+    state.timer_active = False
+
+def scene_opening():
+    play(OPENING)
+
+def scene_middlegame():
+    play(MIDDLEGAME)
+    # A piece selected with its moves shown, the clock running and a hint on screen
+    state.active_selected_pos = (5, 5)
+    state.active_selected_piece = state.position.board[5][5]
+    state.legal_moves_for_selected = [(3, 3), (3, 4), (4, 7), (6, 3), (7, 6)]
+    state.timer_active = True
+    state.last_hint_move = "f3d4"
+    state.ai_eval_score = "+0.42"
+
+def scene_long_log():
+    play(MIDDLEGAME)
+    state.game_move_log = [log_entry(i, MIDDLEGAME[i % len(MIDDLEGAME)]) for i in range(LONG_LOG)]
+
+def scene_long_coach():
+    play(MIDDLEGAME)
+    state.ai_coach_message = COACH_TEXT * 8
+    state.ai_coach_streaming = True
+
+SCENES = {
+    'opening': scene_opening,
+    'middlegame': scene_middlegame,
+    'long_log': scene_long_log,
+    'long_coach': scene_long_coach,
+}
+
+def reset_caches():
+    import ui_renderer
+    fonts.clear()
+    ui_renderer._board_layers.clear()
+
+def time_calls(fn, frames, cold):
+    for _ in range(WARMUP):
+        fn()
+    samples = []
+    for _ in range(frames):
+        if cold:
+            reset_caches()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def run_scene(setup, frames, cold):
+    """{'draw_*' or 'frame': [seconds, ...]} for one scene."""
+    import ui_renderer
+    setup()
+    timings = {}
+    for name in DRAW_FUNCTIONS:
+        timings[name] = time_calls(getattr(ui_renderer, name), frames, cold)
+
+    def full_frame():
+        ui_renderer.invalidate()
+        _, dirty = ui_renderer.draw_frame()
+        pygame.display.update(dirty)
+
+    timings['frame'] = time_calls(full_frame, frames, cold)
+    # An unchanged frame: what the loop pays when it wakes with nothing to draw
+    ui_renderer.draw_frame()
+    timings['idle_frame'] = time_calls(lambda: ui_renderer.draw_frame(), frames, False)
+    return timings
+
+def summarize(timings):
+    """Milliseconds per percentile, rounded for a stable JSON file."""
+    return {name: {f'p{pct}': round(percentile(samples, pct) * 1000, 4) for pct in (50, 95, 99)}
+            for name, samples in timings.items()}
+
+def compare(results, baseline, threshold, min_ms):
+    """
+    Prints the p50 change of every entry; returns the entries that slowed
+    down by more than threshold and by more than min_ms.
+    """
+    regressions = []
+    print(f"\n{'scene':<12}{'function':<20}{'base p50':>10}{'now p50':>10}{'change':>9}")
+    for scene, entries in results.items():
+        for name, stats in entries.items():
+            base = baseline.get(scene, {}).get(name)
+            if not base:
+                continue
+            change = (stats['p50'] - base['p50']) / base['p50'] if base['p50'] else 0.0
+            flag = ''
+            if change > threshold and stats['p50'] - base['p50'] > min_ms:
+                regressions.append((scene, name))
+                flag = '  REGRESSION'
+            print(f"{scene:<12}{name:<20}{base['p50']:>10.3f}{stats['p50']:>10.3f}{change:>+9.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="ui_renderer timing benchmark (no display needed).")
+    parser.add_argument('--frames', type=int, default=200, help='timed calls per function and scene')
+    parser.add_argument('--scene', choices=sorted(SCENES), action='append', help='scene to run (default: all)')
+    parser.add_argument('--cold', action='store_true', help='clear font and board layer caches before every call')
+    parser.add_argument('--save', metavar='FILE', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='p50 slowdown that counts as a regression (default 0.25 = 25%%)')
+    parser.add_argument('--min-ms', type=float, default=0.25,
+                        help='ignore slowdowns smaller than this many milliseconds (timer noise)')
+    args = parser.parse_args()
+
+    pygame.init()
+    state.screen = pygame.display.set_mode((constants.WINDOW_W, constants.WINDOW_H))
+    sprites.preload(constants.SQUARE_SIZE)
+
+    results = {}
+    for scene in args.scene or SCENES:
+        timings = run_scene(SCENES[scene], args.frames, args.cold)
+        results[scene] = summarize(timings)
+        print(f"\n[{scene}]  {args.frames} frames{' (cold caches)' if args.cold else ''}")
+        print(f"  {'function':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, stats in results[scene].items():
+            print(f"  {name:<20}{stats['p50']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'frames': args.frames, 'cold': args.cold, 'results': results}, f, indent=2)
+        print(f"\n--- Baseline written to {args.save} ---")
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('cold') != args.cold:
+            print("--- Baseline was recorded with a different --cold setting ---")
+        regressions = compare(results, baseline['results'], args.threshold, args.min_ms)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} regression(s) over {args.threshold:.0%}")
+            status = 1
+        else:
+            print("\nPASS")
+    pygame.quit()
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
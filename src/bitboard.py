@@ -0,0 +1,515 @@
+"""
+64-bit bitboard position used by the move generator.
+
+Squares are numbered 0..63 as row * 8 + col, which matches the (row, col)
+layout of position.board: square 0 is a8, square 63 is h1. White pawns move
+towards row 0, i.e. towards lower square numbers.
+"""
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLOR_NAMES = ('white', 'black')
+PIECE_NAMES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+COLOR_INDEX = {name: i for i, name in enumerate(COLOR_NAMES)}
+PIECE_INDEX = {name: i for i, name in enumerate(PIECE_NAMES)}
+FEN_PIECES = 'pnbrqk'
+
+# Castling right bits
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 1, 2, 4, 8
+
+FULL = (1 << 64) - 1
+
+def square(row, col):
+    """Converts a (row, col) board cell into a square index."""
+    return row * 8 + col
+
+def cell(sq):
+    """Converts a square index back into a (row, col) board cell."""
+    return divmod(sq, 8)
+
+def iter_bits(bb):
+    """Yields the square index of every set bit, lowest first."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+SQUARE_NAMES = tuple(f"{chr(ord('a') + sq % 8)}{8 - sq // 8}" for sq in range(64))
+
+def square_name(sq):
+    """Algebraic name of a square index, e.g. 52 -> 'e2'."""
+    return SQUARE_NAMES[sq]
+
+def move_to_uci(move):
+    """Formats a (from_sq, to_sq, promo) move as UCI, e.g. 'e7e8q'."""
+    from_sq, to_sq, promo = move
+    suffix = FEN_PIECES[promo] if promo is not None else ''
+    return SQUARE_NAMES[from_sq] + SQUARE_NAMES[to_sq] + suffix
+
+def move_from_uci(uci):
+    """Parses a UCI string such as 'e7e8q' into a (from_sq, to_sq, promo) move."""
+    from_sq = square(8 - int(uci[1]), ord(uci[0]) - ord('a'))
+    to_sq = square(8 - int(uci[3]), ord(uci[2]) - ord('a'))
+    promo = FEN_PIECES.index(uci[4]) if len(uci) > 4 else None
+    return from_sq, to_sq, promo
+
+def bits_to_cells(bb):
+    """Converts a bitboard into a list of (row, col) cells."""
+    return [divmod(sq, 8) for sq in iter_bits(bb)]
+
+def board_castling_rights(board):
+    """Castling rights implied by the has_moved flags on a position.board-style grid."""
+    rights = 0
+    for color, row, k_right, q_right in (('white', 7, CASTLE_WK, CASTLE_WQ), ('black', 0, CASTLE_BK, CASTLE_BQ)):
+        king = board[row][4]
+        if not (king and king.type == 'king' and king.color == color and not king.has_moved):
+            continue
+        for col, right in ((7, k_right), (0, q_right)):
+            rook = board[row][col]
+            if rook and rook.type == 'rook' and rook.color == color and not rook.has_moved:
+                rights |= right
+    return rights
+
+def _offset_table(offsets):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        bb = 0
+        for dr, dc in offsets:
+            tr, tc = r + dr, c + dc
+            if 0 <= tr < 8 and 0 <= tc < 8:
+                bb |= 1 << (tr * 8 + tc)
+        table.append(bb)
+    return table
+
+# --- Precomputed Leaper Attacks ---
+KNIGHT_ATTACKS = _offset_table([(2,1), (2,-1), (-2,1), (-2,-1), (1,2), (1,-2), (-1,2), (-1,-2)])
+KING_ATTACKS = _offset_table([(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)])
+PAWN_ATTACKS = (
+    _offset_table([(-1,-1), (-1,1)]),  # White captures towards row 0
+    _offset_table([(1,-1), (1,1)]),    # Black captures towards row 7
+)
+
+# --- Precomputed Rays for Sliding Pieces ---
+# Directions whose square index increases along the ray use the lowest
+# blocker; the others use the highest.
+ROOK_DIRECTIONS = [(1,0), (0,1), (-1,0), (0,-1)]
+BISHOP_DIRECTIONS = [(1,1), (1,-1), (-1,-1), (-1,1)]
+
+def _ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        bb = 0
+        r, c = r + dr, c + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb |= 1 << (r * 8 + c)
+            r, c = r + dr, c + dc
+        table.append(bb)
+    return table
+
+def _ray_set(directions):
+    return [(_ray_table(dr, dc), dr * 8 + dc > 0) for dr, dc in directions]
+
+ROOK_RAYS = _ray_set(ROOK_DIRECTIONS)
+BISHOP_RAYS = _ray_set(BISHOP_DIRECTIONS)
+
+def _slide(rays, sq, occupied):
+    attacks = 0
+    for table, ascending in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if ascending:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+def _between_table():
+    table = [[0] * 64 for _ in range(64)]
+    for rays in (ROOK_RAYS, BISHOP_RAYS):
+        for ray_table, _ in rays:
+            for sq in range(64):
+                for target in iter_bits(ray_table[sq]):
+                    # Squares strictly between sq and target along this ray
+                    table[sq][target] = ray_table[sq] & ~ray_table[target] & ~(1 << target)
+    return table
+
+BETWEEN = _between_table()
+
+def _castling_mask():
+    # Moving from or capturing on these squares clears the matching right
+    mask = [0xF] * 64
+    mask[square(7, 4)] &= ~(CASTLE_WK | CASTLE_WQ)
+    mask[square(7, 7)] &= ~CASTLE_WK
+    mask[square(7, 0)] &= ~CASTLE_WQ
+    mask[square(0, 4)] &= ~(CASTLE_BK | CASTLE_BQ)
+    mask[square(0, 7)] &= ~CASTLE_BK
+    mask[square(0, 0)] &= ~CASTLE_BQ
+    return mask
+
+CASTLING_MASK = _castling_mask()
+
+def rook_attacks(sq, occupied):
+    """Squares a rook on sq attacks given the occupancy bitboard."""
+    return _slide(ROOK_RAYS, sq, occupied)
+
+def bishop_attacks(sq, occupied):
+    """Squares a bishop on sq attacks given the occupancy bitboard."""
+    return _slide(BISHOP_RAYS, sq, occupied)
+
+def queen_attacks(sq, occupied):
+    return _slide(ROOK_RAYS, sq, occupied) | _slide(BISHOP_RAYS, sq, occupied)
+
+def piece_attacks(piece_type, color, sq, occupied):
+    """Attack set of a single piece, independent of what it may capture."""
+    if piece_type == PAWN:
+        return PAWN_ATTACKS[color][sq]
+    if piece_type == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if piece_type == KING:
+        return KING_ATTACKS[sq]
+    if piece_type == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if piece_type == ROOK:
+        return rook_attacks(sq, occupied)
+    return queen_attacks(sq, occupied)
+
+def is_attacked(enemy, by_color, sq, occupied):
+    """
+    Reverse-ray attack test: looks outward from sq using the leaper tables
+    and the sliding rays, returning as soon as one attacker is found.
+    'enemy' is the list of six piece bitboards belonging to by_color.
+    """
+    if KNIGHT_ATTACKS[sq] & enemy[KNIGHT]:
+        return True
+    if PAWN_ATTACKS[by_color ^ 1][sq] & enemy[PAWN]:
+        return True
+    if KING_ATTACKS[sq] & enemy[KING]:
+        return True
+    rooks = enemy[ROOK] | enemy[QUEEN]
+    if rooks and _slide(ROOK_RAYS, sq, occupied) & rooks:
+        return True
+    bishops = enemy[BISHOP] | enemy[QUEEN]
+    return bool(bishops and _slide(BISHOP_RAYS, sq, occupied) & bishops)
+
+# Whole-set pawn attacks, shifting every pawn at once (files masked against wrap)
+FILE_A = sum(1 << (r * 8) for r in range(8))
+FILE_H = FILE_A << 7
+PAWN_SHIFTS = (
+    lambda pawns: ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7),
+    lambda pawns: (((pawns & ~FILE_H) << 9) | ((pawns & ~FILE_A) << 7)) & FULL,
+)
+
+class BitboardPosition:
+    """One bitboard per (colour, piece type) plus occupancy and game flags."""
+    __slots__ = ('pieces', 'occupied_by', 'occupied', 'turn', 'castling', 'ep_square')
+
+    def __init__(self):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied_by = [0, 0]
+        self.occupied = 0
+        self.turn = WHITE
+        self.castling = 0
+        self.ep_square = None
+
+    @classmethod
+    def from_board(cls, board, turn_color, en_passant_target=None):
+        """Builds a position from an 8x8 grid of ChessPiece objects."""
+        pos = cls()
+        for r in range(8):
+            row = board[r]
+            for c in range(8):
+                p = row[c]
+                if p:
+                    bit = 1 << (r * 8 + c)
+                    color = COLOR_INDEX[p.color]
+                    pos.pieces[color][PIECE_INDEX[p.type]] |= bit
+                    pos.occupied_by[color] |= bit
+        pos.occupied = pos.occupied_by[WHITE] | pos.occupied_by[BLACK]
+        pos.turn = COLOR_INDEX[turn_color]
+        if en_passant_target:
+            pos.ep_square = square(*en_passant_target)
+
+        pos.castling = board_castling_rights(board)
+        return pos
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Builds a position from a FEN string (move counters are ignored)."""
+        parts = fen.split()
+        pos = cls()
+        for r, rank in enumerate(parts[0].split('/')):
+            c = 0
+            for ch in rank:
+                if ch.isdigit():
+                    c += int(ch)
+                    continue
+                color = WHITE if ch.isupper() else BLACK
+                bit = 1 << (r * 8 + c)
+                pos.pieces[color][FEN_PIECES.index(ch.lower())] |= bit
+                pos.occupied_by[color] |= bit
+                c += 1
+        pos.occupied = pos.occupied_by[WHITE] | pos.occupied_by[BLACK]
+        pos.turn = WHITE if len(parts) < 2 or parts[1] == 'w' else BLACK
+        if len(parts) > 2:
+            for ch, right in zip('KQkq', (CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ)):
+                if ch in parts[2]:
+                    pos.castling |= right
+        if len(parts) > 3 and parts[3] != '-':
+            pos.ep_square = square(8 - int(parts[3][1]), ord(parts[3][0]) - ord('a'))
+        return pos
+
+    def to_fen(self):
+        """FEN of the position, with zeroed move counters."""
+        rows = []
+        for r in range(8):
+            row_str, empty = "", 0
+            for c in range(8):
+                found = self.piece_at(r * 8 + c)
+                if found is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row_str += str(empty)
+                    empty = 0
+                color, piece_type = found
+                ch = FEN_PIECES[piece_type]
+                row_str += ch.upper() if color == WHITE else ch
+            if empty:
+                row_str += str(empty)
+            rows.append(row_str)
+        castling = ''.join(ch for ch, right in zip('KQkq', (CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ))
+                           if self.castling & right)
+        ep = square_name(self.ep_square) if self.ep_square is not None else '-'
+        side = 'w' if self.turn == WHITE else 'b'
+        return f"{'/'.join(rows)} {side} {castling or '-'} {ep} 0 1"
+
+    def piece_at(self, sq):
+        """Returns (color, piece_type) for the square, or None if empty."""
+        bit = 1 << sq
+        if not self.occupied & bit:
+            return None
+        color = WHITE if self.occupied_by[WHITE] & bit else BLACK
+        for piece_type, bb in enumerate(self.pieces[color]):
+            if bb & bit:
+                return color, piece_type
+        return None
+
+    def king_square(self, color):
+        king = self.pieces[color][KING]
+        return king.bit_length() - 1 if king else None
+
+    def attacks_by(self, color):
+        """Union of every square attacked by the given colour, in one pass."""
+        occ = self.occupied
+        bbs = self.pieces[color]
+        attacked = PAWN_SHIFTS[color](bbs[PAWN])
+        for sq in iter_bits(bbs[KNIGHT]):
+            attacked |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(bbs[BISHOP] | bbs[QUEEN]):
+            attacked |= bishop_attacks(sq, occ)
+        for sq in iter_bits(bbs[ROOK] | bbs[QUEEN]):
+            attacked |= rook_attacks(sq, occ)
+        king = bbs[KING]
+        if king:
+            attacked |= KING_ATTACKS[king.bit_length() - 1]
+        return attacked
+
+    def attackers_to(self, sq, by_color, occupied=None):
+        """Bitboard of by_color pieces attacking sq, found by looking outward from sq."""
+        if occupied is None:
+            occupied = self.occupied
+        enemy = self.pieces[by_color]
+        return ((PAWN_ATTACKS[by_color ^ 1][sq] & enemy[PAWN])
+                | (KNIGHT_ATTACKS[sq] & enemy[KNIGHT])
+                | (KING_ATTACKS[sq] & enemy[KING])
+                | (rook_attacks(sq, occupied) & (enemy[ROOK] | enemy[QUEEN]))
+                | (bishop_attacks(sq, occupied) & (enemy[BISHOP] | enemy[QUEEN])))
+
+    def is_square_attacked(self, sq, by_color, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
+        return is_attacked(self.pieces[by_color], by_color, sq, occupied)
+
+    def in_check(self, color):
+        k_sq = self.king_square(color)
+        return k_sq is not None and self.is_square_attacked(k_sq, color ^ 1)
+
+    def piece_targets(self, sq):
+        """Pseudo-legal destination squares for the piece on sq (no castling)."""
+        found = self.piece_at(sq)
+        if found is None:
+            return 0
+        color, piece_type = found
+        own = self.occupied_by[color]
+        enemy = self.occupied_by[color ^ 1]
+        if piece_type != PAWN:
+            return piece_attacks(piece_type, color, sq, self.occupied) & ~own & FULL
+
+        # Pawn pushes (blocked by any piece) and diagonal captures
+        targets = 0
+        row = sq >> 3
+        step = -8 if color == WHITE else 8
+        one = sq + step
+        if 0 <= one < 64 and not self.occupied >> one & 1:
+            targets |= 1 << one
+            start_row = 6 if color == WHITE else 1
+            two = one + step
+            if row == start_row and not self.occupied >> two & 1:
+                targets |= 1 << two
+        captures = enemy
+        if self.ep_square is not None and color == self.turn:
+            captures |= 1 << self.ep_square
+        return targets | (PAWN_ATTACKS[color][sq] & captures)
+
+    def copy(self):
+        pos = BitboardPosition.__new__(BitboardPosition)
+        pos.pieces = [list(self.pieces[WHITE]), list(self.pieces[BLACK])]
+        pos.occupied_by = list(self.occupied_by)
+        pos.occupied = self.occupied
+        pos.turn = self.turn
+        pos.castling = self.castling
+        pos.ep_square = self.ep_square
+        return pos
+
+    def apply(self, move):
+        """Returns a new position with move (from_sq, to_sq, promo) played."""
+        from_sq, to_sq, promo = move
+        pos = self.copy()
+        us, them = self.turn, self.turn ^ 1
+        _, piece_type = self.piece_at(from_sq)
+        from_bit, to_bit = 1 << from_sq, 1 << to_sq
+        mine, theirs = pos.pieces[us], pos.pieces[them]
+
+        # Captures (including the pawn behind an en passant square)
+        if pos.occupied_by[them] & to_bit:
+            for i in range(6):
+                theirs[i] &= ~to_bit
+            pos.occupied_by[them] &= ~to_bit
+        elif piece_type == PAWN and to_sq == self.ep_square:
+            cap_bit = 1 << (to_sq + (8 if us == WHITE else -8))
+            theirs[PAWN] &= ~cap_bit
+            pos.occupied_by[them] &= ~cap_bit
+
+        mine[piece_type] &= ~from_bit
+        mine[promo if promo is not None else piece_type] |= to_bit
+        pos.occupied_by[us] = (pos.occupied_by[us] & ~from_bit) | to_bit
+
+        # Castling moves the rook as well
+        if piece_type == KING and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            rook_bits = (1 << rook_from) | (1 << rook_to)
+            mine[ROOK] ^= rook_bits
+            pos.occupied_by[us] ^= rook_bits
+
+        pos.occupied = pos.occupied_by[WHITE] | pos.occupied_by[BLACK]
+        pos.castling &= CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        pos.ep_square = None
+        if piece_type == PAWN and abs(to_sq - from_sq) == 16:
+            pos.ep_square = (from_sq + to_sq) // 2
+        pos.turn = them
+        return pos
+
+    def pin_masks(self, color):
+        """Maps each pinned piece of color to the squares it may still move to."""
+        k_sq = self.king_square(color)
+        enemy = self.pieces[color ^ 1]
+        own = self.occupied_by[color]
+        pins = {}
+        # Enemy sliders that would see the king if our own pieces were removed
+        rooks = rook_attacks(k_sq, self.occupied_by[color ^ 1]) & (enemy[ROOK] | enemy[QUEEN])
+        bishops = bishop_attacks(k_sq, self.occupied_by[color ^ 1]) & (enemy[BISHOP] | enemy[QUEEN])
+        for pinner in iter_bits(rooks | bishops):
+            between = BETWEEN[k_sq][pinner]
+            blockers = between & self.occupied
+            if blockers and blockers & (blockers - 1) == 0 and blockers & own:
+                pins[blockers.bit_length() - 1] = between | (1 << pinner)
+        return pins
+
+    def legal_moves(self):
+        """
+        Every legal move as (from_sq, to_sq, promo). Checkers and pins are
+        computed once and used as masks; only king moves and en passant are
+        verified by playing them out.
+        """
+        us, them = self.turn, self.turn ^ 1
+        k_sq = self.king_square(us)
+        if k_sq is None:
+            return []
+        own = self.occupied_by[us]
+        enemy_occ = self.occupied_by[them]
+        occ = self.occupied
+        enemy = self.pieces[them]
+        moves = []
+
+        # --- King moves: tested against the board with the king lifted ---
+        occ_no_king = occ & ~(1 << k_sq)
+        for to_sq in iter_bits(KING_ATTACKS[k_sq] & ~own):
+            if not is_attacked(enemy, them, to_sq, occ_no_king):
+                moves.append((k_sq, to_sq, None))
+
+        checkers = self.attackers_to(k_sq, them)
+        if checkers & (checkers - 1):
+            return moves  # Double check: only the king may move
+
+        if checkers:
+            check_mask = checkers | BETWEEN[k_sq][checkers.bit_length() - 1]
+        else:
+            check_mask = FULL
+            moves.extend(self._castling_moves(us, k_sq))
+
+        pins = self.pin_masks(us)
+        mine = self.pieces[us]
+        last_row = 0 if us == WHITE else 7
+        for piece_type in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN):
+            for from_sq in iter_bits(mine[piece_type]):
+                if piece_type == PAWN:
+                    targets = self._pawn_pushes(us, from_sq) | (PAWN_ATTACKS[us][from_sq] & enemy_occ)
+                else:
+                    targets = piece_attacks(piece_type, us, from_sq, occ) & ~own
+                targets &= check_mask & pins.get(from_sq, FULL)
+                for to_sq in iter_bits(targets):
+                    if piece_type == PAWN and to_sq >> 3 == last_row:
+                        for promo in (QUEEN, ROOK, BISHOP, KNIGHT):
+                            moves.append((from_sq, to_sq, promo))
+                    else:
+                        moves.append((from_sq, to_sq, None))
+
+        # --- En passant: discovered checks along the rank need a full replay ---
+        if self.ep_square is not None:
+            for from_sq in iter_bits(PAWN_ATTACKS[them][self.ep_square] & mine[PAWN]):
+                move = (from_sq, self.ep_square, None)
+                if not self.apply(move).in_check(us):
+                    moves.append(move)
+        return moves
+
+    def _pawn_pushes(self, color, sq):
+        step = -8 if color == WHITE else 8
+        one = sq + step
+        if not 0 <= one < 64 or self.occupied >> one & 1:
+            return 0
+        pushes = 1 << one
+        start_row = 6 if color == WHITE else 1
+        if sq >> 3 == start_row and not self.occupied >> (one + step) & 1:
+            pushes |= 1 << (one + step)
+        return pushes
+
+    def _castling_moves(self, color, k_sq):
+        """Castling for a king that is not in check; rights imply home squares."""
+        moves = []
+        them = color ^ 1
+        k_right, q_right = (CASTLE_WK, CASTLE_WQ) if color == WHITE else (CASTLE_BK, CASTLE_BQ)
+        if self.castling & k_right:
+            if not self.occupied & ((1 << (k_sq + 1)) | (1 << (k_sq + 2))):
+                if not self.is_square_attacked(k_sq + 1, them) and not self.is_square_attacked(k_sq + 2, them):
+                    moves.append((k_sq, k_sq + 2, None))
+        if self.castling & q_right:
+            if not self.occupied & ((1 << (k_sq - 1)) | (1 << (k_sq - 2)) | (1 << (k_sq - 3))):
+                if not self.is_square_attacked(k_sq - 1, them) and not self.is_square_attacked(k_sq - 2, them):
+                    moves.append((k_sq, k_sq - 2, None))
+        return moves
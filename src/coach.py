@@ -0,0 +1,167 @@
+"""
+Latency-hedged coach.
+
+Every hint gets an explanation straight away, built locally from the
+engine's principal variation: the move itself, captures, checks and the
+material swing along the line. The LLM is asked in parallel and its answer
+replaces the local text only if it starts arriving within the time budget
+(COACH_BUDGET seconds); otherwise the local explanation stands. Hits,
+misses and latency are kept as metrics.
+"""
+import os
+import threading
+import time
+
+import bitboard
+from bitboard import BitboardPosition, WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, PIECE_NAMES
+from ai_interface import get_ai_coach_commentary
+
+COACH_BUDGET = float(os.getenv("COACH_BUDGET", "2.0"))  # seconds the LLM has to start answering
+LINE_PLIES = 6                                          # PV plies the local explanation looks at
+
+PIECE_VALUES = {PAWN: 1, KNIGHT: 3, BISHOP: 3, ROOK: 5, QUEEN: 9, KING: 0}
+
+def material(pos, color):
+    return sum(bin(pos.pieces[color][t]).count('1') * v for t, v in PIECE_VALUES.items())
+
+def _square_pair(move):
+    return f"{bitboard.square_name(move[0])}-{bitboard.square_name(move[1])}".upper()
+
+def _describe_move(pos, move):
+    """One sentence about the first move of the line."""
+    color, piece_type = pos.piece_at(move[0])
+    target = pos.piece_at(move[1])
+    child = pos.apply(move)
+
+    if piece_type == KING and abs(move[1] - move[0]) == 2:
+        side = "kingside" if move[1] > move[0] else "queenside"
+        subject, actions = f"Castling {side}", ["tucks the king away"]
+    else:
+        subject, actions = f"{PIECE_NAMES[piece_type].capitalize()} {_square_pair(move)}", []
+        if target is not None:
+            actions.append(f"captures the {PIECE_NAMES[target[1]]}")
+        elif piece_type == PAWN and move[1] == pos.ep_square:
+            actions.append("captures the pawn en passant")
+        elif piece_type in (KNIGHT, BISHOP) and move[0] // 8 == (7 if color == WHITE else 0):
+            actions.append(f"develops the {PIECE_NAMES[piece_type]}")
+        if move[2] is not None:
+            actions.append(f"promotes to a {PIECE_NAMES[move[2]]}")
+
+    if child.in_check(color ^ 1):
+        actions.append("delivers checkmate" if not child.legal_moves() else "gives check")
+    if not actions:
+        return f"{subject} is the engine's choice."
+    return f"{subject} {' and '.join(actions)}."
+
+def explain_locally(fen, result):
+    """
+    Template explanation of an analyse_position() result for fen, built from
+    its PV with the bitboard move generator. Never calls the network.
+    """
+    pos = BitboardPosition.from_fen(fen)
+    mover = pos.turn
+    pv = result.get('pv') or ([result['move']] if result.get('move') else [])
+    line, checks, captures = [], 0, 0
+    start_balance = material(pos, mover) - material(pos, mover ^ 1)
+    for uci in pv[:LINE_PLIES]:
+        move = bitboard.move_from_uci(uci)
+        if move not in pos.legal_moves():
+            break  # Stale or truncated PV; explain what is still valid
+        if pos.piece_at(move[1]) is not None or (move[1] == pos.ep_square and pos.piece_at(move[0])[1] == PAWN):
+            captures += 1
+        if not line:
+            first = _describe_move(pos, move)
+        pos = pos.apply(move)
+        if pos.in_check(pos.turn):
+            checks += 1
+        line.append(_square_pair(move))
+    if not line:
+        return "No clear best move found."
+
+    sentences = [first]
+    if len(line) > 1:
+        swing = material(pos, mover) - material(pos, mover ^ 1) - start_balance
+        if swing > 0:
+            outcome = f"it wins material (+{swing})"
+        elif swing < 0:
+            outcome = f"it gives up material ({swing}) for activity"
+        else:
+            outcome = "material stays level"
+        sentences.append(f"In the main line {' '.join(line)}, {outcome}.")
+        extras = []
+        if captures:
+            extras.append(f"{captures} capture{'s' if captures > 1 else ''}")
+        if checks:
+            extras.append(f"{checks} check{'s' if checks > 1 else ''}")
+        if extras:
+            sentences.append(f"Watch for the {' and '.join(extras)} along the way.")
+    if result.get('eval'):
+        sentences.append(f"Engine evaluation: {result['eval']}.")
+    return ' '.join(sentences)
+
+class HedgedCoach:
+    def __init__(self, budget=COACH_BUDGET):
+        self.budget = budget
+        self.hits = 0          # LLM answered within budget
+        self.misses = 0        # budget ran out (or the LLM failed); local text kept
+        self.last_latency = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def request(self, fen, result, on_final, on_partial=None):
+        """
+        Shows the local explanation via on_final() at once, then hands the
+        LLM's answer to on_partial()/on_final() if it arrives in time.
+        A newer request silences any older one still in flight.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        started = time.monotonic()
+        decision = []  # [] until decided, then ['llm'] or ['local']
+        answered_at = []
+
+        def decide(answered):
+            with self._lock:
+                if answered and not answered_at:
+                    answered_at.append(time.monotonic() - started)
+                    self.last_latency = answered_at[0]
+                if not decision:
+                    in_time = answered and answered_at[0] <= self.budget
+                    decision.append('llm' if in_time else 'local')
+                    if in_time:
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+                return decision[0] == 'llm' and generation == self._generation
+
+        def partial(text):
+            if decide(True) and on_partial:
+                on_partial(text)
+
+        def final(text):
+            if text is None:
+                # Coach error: the local text stands (restored if streaming had begun)
+                if decide(False):
+                    on_final(local_text)
+            elif decide(True):
+                on_final(text)
+
+        local_text = explain_locally(fen, result)
+        on_final(local_text)
+        timer = threading.Timer(self.budget, decide, args=(False,))
+        timer.daemon = True
+        timer.start()
+        get_ai_coach_commentary(fen, result['move'], result['eval'], final, partial)
+
+    def metrics(self):
+        total = self.hits + self.misses
+        return {
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'last_latency': self.last_latency,
+        }
+
+coach = HedgedCoach()
@@ -0,0 +1,79 @@
+"""
+Pool of Stockfish processes with prioritised checkout.
+
+Each request borrows one engine for the duration of a search. When all
+engines are busy, waiters are served in priority order (lower number
+first), then first-come first-served, so a bot move never queues behind a
+background evaluation.
+"""
+import heapq
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+
+# Request priorities (lower is served first)
+PRIORITY_BOT = 0
+PRIORITY_HINT = 1
+PRIORITY_EVAL = 2
+
+def default_pool_size():
+    """Half the cores (Stockfish threads get the rest), between 1 and 4 engines."""
+    env_size = os.getenv("STOCKFISH_POOL_SIZE")
+    if env_size:
+        return max(1, int(env_size))
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+class _Waiter:
+    __slots__ = ('event', 'engine', 'cancelled')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.engine = None
+        self.cancelled = False
+
+class EnginePool:
+    def __init__(self, factory, size=None):
+        self.size = size or default_pool_size()
+        self._idle = [factory() for _ in range(self.size)]
+        self._waiters = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def checkout(self, priority=PRIORITY_EVAL, timeout=None):
+        """Borrows an engine, blocking until one is free. Returns None on timeout."""
+        with self._lock:
+            # Idle engines only exist when no live waiter is queued
+            if self._idle:
+                return self._idle.pop()
+            waiter = _Waiter()
+            heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        if waiter.event.wait(timeout):
+            return waiter.engine
+        with self._lock:
+            waiter.cancelled = True
+            if waiter.engine is None:
+                return None
+        # Handed an engine just as we timed out; keep it rather than leak it
+        return waiter.engine
+
+    def release(self, engine):
+        """Returns an engine to the pool, handing it to the most urgent waiter."""
+        with self._lock:
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if not waiter.cancelled:
+                    waiter.engine = engine
+                    waiter.event.set()
+                    return
+            self._idle.append(engine)
+
+    @contextmanager
+    def engine(self, priority=PRIORITY_EVAL, timeout=None):
+        """Context manager around checkout()/release(); yields None on timeout."""
+        eng = self.checkout(priority, timeout)
+        try:
+            yield eng
+        finally:
+            if eng is not None:
+                self.release(eng)
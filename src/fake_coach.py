@@ -0,0 +1,61 @@
+"""
+Local stand-in for the Gemini model, selected with COACH_BACKEND=fake.
+
+Implements the part of the generate_content() API the coach uses, including
+stream=True, and emits canned advice a few words at a time with a delay
+per chunk, so streaming can be exercised without network access.
+"""
+import os
+import time
+
+CHUNK_DELAY = float(os.getenv("COACH_FAKE_DELAY", "0.08"))  # seconds per chunk
+FIRST_CHUNK_DELAY = float(os.getenv("COACH_FAKE_LATENCY", "0.15"))  # seconds before the first chunk
+
+ADVICE = ("This move improves your worst-placed piece and keeps control of the centre. "
+          "Look for a follow-up that brings another piece into play before starting an attack.")
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class _Response:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    @property
+    def text(self):
+        return ''.join(c.text for c in self._chunks)
+
+class _StreamingResponse:
+    def __init__(self, chunks, chunk_delay, first_delay):
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self._first_delay = first_delay
+
+    def __iter__(self):
+        for i, chunk in enumerate(self._chunks):
+            time.sleep(self._first_delay if i == 0 else self._chunk_delay)
+            yield chunk
+
+class FakeCoachModel:
+    def __init__(self, advice=ADVICE, words_per_chunk=3, chunk_delay=CHUNK_DELAY, first_delay=FIRST_CHUNK_DELAY):
+        self.advice = advice
+        self.words_per_chunk = words_per_chunk
+        self.chunk_delay = chunk_delay
+        self.first_delay = first_delay
+        self.calls = 0
+
+    def _chunks(self):
+        words = self.advice.split(' ')
+        step = self.words_per_chunk
+        return [_Chunk(' '.join(words[i:i + step]) + (' ' if i + step < len(words) else ''))
+                for i in range(0, len(words), step)]
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        chunks = self._chunks()
+        if stream:
+            return _StreamingResponse(chunks, self.chunk_delay, self.first_delay)
+        # Non-streaming callers wait for the whole answer, like the real API
+        time.sleep(self.first_delay + self.chunk_delay * (len(chunks) - 1))
+        return _Response(chunks)
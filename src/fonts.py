@@ -0,0 +1,102 @@
+"""
+Font registry and rendered-text cache for the GUI.
+
+Each named font is created once (SysFont is slow: it searches the system
+font list every call). Rendered labels and wrapped paragraphs are kept in
+small LRU caches keyed by (font name, text, colour), so a frame that
+shows the same text as the last one renders nothing.
+"""
+import os
+from collections import OrderedDict
+
+import pygame
+
+TEXT_CACHE_SIZE = int(os.getenv("TEXT_CACHE_SIZE", "512"))  # rendered text surfaces kept
+WRAP_CACHE_SIZE = 64                                        # wrapped paragraphs kept
+
+# name -> (SysFont name, size, bold)
+FONT_SPECS = {
+    'topbar':    ('Segoe UI', 17, True),
+    'label':     ('Segoe UI', 14, True),
+    'bottom':    ('Segoe UI', 16, True),
+    'title':     ('Segoe UI', 24, True),
+    'medium':    ('Segoe UI', 18, True),
+    'small':     ('Segoe UI', 15, False),
+    'hint':      ('Segoe UI', 13, False),
+    'timer':     ('Consolas', 26, True),
+    'eval':      ('Segoe UI', 30, True),
+    'history':   ('Segoe UI', 20, True),
+    'log':       ('Consolas', 14, False),
+    'dev':       ('Consolas', 13, False),
+}
+
+_fonts = {}
+_surfaces = OrderedDict()  # (name, text, color) -> Surface
+_wrapped = OrderedDict()   # (name, text, width) -> list of lines
+hits = 0
+misses = 0
+
+def get(name):
+    """The pygame Font registered under name, created on first use."""
+    font = _fonts.get(name)
+    if font is None:
+        face, size, bold = FONT_SPECS[name]
+        font = _fonts[name] = pygame.font.SysFont(face, size, bold=bold)
+    return font
+
+def _lookup(cache, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def _store(cache, key, value, limit):
+    cache[key] = value
+    if len(cache) > limit:
+        cache.popitem(last=False)
+
+def render(name, text, color):
+    """Antialiased text surface for a named font, rendered once per (text, colour)."""
+    global hits, misses
+    key = (name, text, tuple(color))
+    surface = _lookup(_surfaces, key)
+    if surface is None:
+        misses += 1
+        surface = get(name).render(text, True, color)
+        _store(_surfaces, key, surface, TEXT_CACHE_SIZE)
+    else:
+        hits += 1
+    return surface
+
+def wrap_text(text, font, max_width):
+    """
+    Greedy word wrap. Each word costs one font.size() call on the line being
+    built, so the work grows with the text, not with its square.
+    """
+    words = str(text).split(' ')
+    lines = []
+    line = words[0]
+    for word in words[1:]:
+        candidate = line + ' ' + word
+        if font.size(candidate)[0] > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    lines.append(line)
+    return lines
+
+def wrap(name, text, max_width):
+    """wrap_text() for a named font, remembered per (text, width)."""
+    key = (name, text, max_width)
+    lines = _lookup(_wrapped, key)
+    if lines is None:
+        lines = wrap_text(text, get(name), max_width)
+        _store(_wrapped, key, lines, WRAP_CACHE_SIZE)
+    return lines
+
+def clear():
+    """Drops every font and cached surface, e.g. after pygame.quit()."""
+    _fonts.clear()
+    _surfaces.clear()
+    _wrapped.clear()
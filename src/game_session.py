@@ -0,0 +1,82 @@
+"""
+One game as a self-contained object, for hosting many games at once.
+
+A GameSession owns its Position and move list and knows whether a bot
+plays one side. It never touches the GUI's module state, so a server can
+keep hundreds of them side by side.
+"""
+import bitboard
+import game_status
+import move_logic
+from position import Position
+
+class IllegalMove(ValueError):
+    pass
+
+class GameSession:
+    def __init__(self, game_id, bot_color=None, depth=None):
+        self.game_id = game_id
+        self.bot_color = bot_color  # 'white', 'black' or None for two humans
+        self.depth = depth          # Engine depth for this game's bot, hints and evals
+        self.position = Position.initial()
+        self.moves = []             # UCI strings, in order
+        self._status = (None, None, 0)  # (zobrist key, status, ply count) memo
+        self._legal = (None, [])        # (zobrist key, UCI moves) memo
+
+    def legal_moves(self):
+        """Legal moves for the side to move, as UCI strings."""
+        key = self.position.zobrist_key
+        if self._legal[0] != key:
+            moves = move_logic.generate_all_legal_moves(self.position)
+            self._legal = (key, [bitboard.move_to_uci(m) for m in moves])
+        return self._legal[1]
+
+    def play(self, uci):
+        """Plays a UCI move such as 'e2e4' or 'e7e8n'. Raises IllegalMove if it is not legal."""
+        if self.status() != 'ongoing':
+            raise IllegalMove(f"game is over ({self.status()})")
+        if uci not in self.legal_moves():
+            raise IllegalMove(f"illegal move: {uci}")
+        from_sq, to_sq, promo = bitboard.move_from_uci(uci)
+        promotion = bitboard.PIECE_NAMES[promo] if promo is not None else 'queen'
+        self.position.make(bitboard.cell(from_sq), bitboard.cell(to_sq), promotion)
+        self.moves.append(uci)
+
+    def undo(self):
+        """
+        Takes back the last move. Against a bot its reply goes too, so the
+        human is to move again (unless the bot made the only move).
+        """
+        self._take_back()
+        if self.bot_color == self.position.turn and self.moves:
+            self._take_back()
+
+    def _take_back(self):
+        if self.position.unmake():
+            self.moves.pop()
+
+    def status(self):
+        """'ongoing', 'checkmate', 'stalemate' or 'repetition' (threefold)."""
+        key = self.position.zobrist_key
+        if self._status[0] != key or len(self.position.key_history) != self._status[2]:
+            self._status = (key, self._compute_status(), len(self.position.key_history))
+        return self._status[1]
+
+    def _compute_status(self):
+        status = self.position.facts().status
+        if status == 'ongoing' and game_status.repetition_count(self.position) >= 3:
+            return 'repetition'
+        return status
+
+    def bot_to_move(self):
+        return self.bot_color == self.position.turn and self.status() == 'ongoing'
+
+    def snapshot(self):
+        return {
+            'game': self.game_id,
+            'fen': self.position.to_fen(),
+            'turn': self.position.turn,
+            'status': self.status(),
+            'moves': len(self.moves),
+            'legal': self.legal_moves(),
+        }
@@ -1,21 +1,24 @@
-import state
 from move_physics import is_king_in_check
 import move_logic
 
-def has_no_legal_moves(color):
+def has_no_legal_moves(position, color):
     """Determines if the game should end due to lack of valid moves."""
-    for r in range(8):
-        for col in range(8):
-            p = state.board[r][col]
-            if p and p.color == color:
-                if move_logic.get_fully_legal_moves(p, r, col):
-                    return False
-    return True
+    if color == position.turn:
+        return position.facts().legal_count == 0
+    return not move_logic.generate_legal_moves_for(position, color)
 
-def is_stalemate(color):
-    """Returns True if the current color is in stalemate (no moves, not in check)."""
-    return has_no_legal_moves(color) and not is_king_in_check(color)
+def is_stalemate(position, color):
+    """Returns True if the given color is in stalemate (no moves, not in check)."""
+    if color == position.turn:
+        return position.facts().status == 'stalemate'
+    return has_no_legal_moves(position, color) and not is_king_in_check(position, color)
 
-def is_checkmate(color):
-    """Returns True if the current color is in checkmate (no moves, in check)."""
-    return has_no_legal_moves(color) and is_king_in_check(color)
+def is_checkmate(position, color):
+    """Returns True if the given color is in checkmate (no moves, in check)."""
+    if color == position.turn:
+        return position.facts().status == 'checkmate'
+    return has_no_legal_moves(position, color) and is_king_in_check(position, color)
+
+def repetition_count(position):
+    """How many times the position has occurred in its game."""
+    return position.key_history.count(position.zobrist_key)
@@ -29,8 +29,10 @@ def handle_mouse_input(position, ui_rects):
         
     if ui_rects['bot_tog'].collidepoint(mx, my):
         state.ai_opponent_enabled = not state.ai_opponent_enabled
-        if state.ai_opponent_enabled and state.current_turn_color == 'black':
+        if state.ai_opponent_enabled and state.position.turn == 'black':
             ai_agent.perform_ai_turn()
+        else:
+            engine.refresh_analysis()
         state.active_selected_piece = None
         state.active_selected_pos = None
         state.legal_moves_for_selected = []
@@ -59,16 +61,16 @@ def handle_mouse_input(position, ui_rects):
 
         # Phase 1: Picking up a piece
         if state.active_selected_piece is None:
-            p = state.board[row][col]
-            if p and p.color == state.current_turn_color:
+            p = state.position.board[row][col]
+            if p and p.color == state.position.turn:
                 state.active_selected_piece = p
                 state.active_selected_pos = (row, col)
-                state.legal_moves_for_selected = move_logic.get_fully_legal_moves(p, row, col)
+                state.legal_moves_for_selected = move_logic.get_fully_legal_moves(state.position, row, col)
         
         # Phase 2: Placing the selected piece
         else:
             if (row, col) in state.legal_moves_for_selected:
-                engine.execute_move(row, col)
+                engine.execute_move(state.active_selected_pos, (row, col))
             
             # Reset selection state
             state.active_selected_piece = None
@@ -0,0 +1,100 @@
+"""
+Load generator for server.py.
+
+Opens many client connections; each plays games against the server's bot
+by choosing random legal moves, and times every move round trip. Reports
+games/sec, moves/sec and latency percentiles, then the server's own stats.
+
+Usage:
+    python src/loadgen.py --clients 200 --games 2             # starts a server in-process
+    python src/loadgen.py --port 8765 --clients 200 --depth 6 # against a running server
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from server import ChessServer, percentile
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+
+    async def call(self, op, **fields):
+        self._next_id += 1
+        request = dict(fields, op=op, id=self._next_id)
+        self.writer.write((json.dumps(request) + '\n').encode())
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+async def play_games(host, port, games, max_plies, depth, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    client = Client(reader, writer)
+    finished = 0
+    try:
+        for _ in range(games):
+            state = await client.call('new', bot='black', depth=depth)
+            plies = 0
+            while state['status'] == 'ongoing' and state['legal'] and plies < max_plies:
+                started = time.perf_counter()
+                state = await client.call('move', game=state['game'], move=rng.choice(state['legal']))
+                latencies.append(time.perf_counter() - started)
+                plies += 2
+            await client.call('close', game=state['game'])
+            finished += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return finished
+
+async def run(args):
+    server = None
+    if args.port is None:
+        server = ChessServer(depth=args.depth)
+        tcp = await server.start(args.host, 0)
+        port = tcp.sockets[0].getsockname()[1]
+    else:
+        port = args.port
+
+    latencies = []
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        play_games(args.host, port, args.games, args.max_plies, args.depth, latencies, random.Random(rng.random()))
+        for _ in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    games = sum(results)
+    ms = lambda pct: percentile(latencies, pct) * 1000
+    print(f"clients {args.clients}  games {games}  moves {len(latencies)}  time {elapsed:.2f}s")
+    print(f"games/sec {games / elapsed:.1f}  moves/sec {len(latencies) / elapsed:.1f}")
+    if latencies:
+        print(f"move latency ms  p50 {ms(50):.2f}  p95 {ms(95):.2f}  p99 {ms(99):.2f}  max {max(latencies) * 1000:.2f}")
+
+    reader, writer = await asyncio.open_connection(args.host, port)
+    print("server stats:", json.dumps(await Client(reader, writer).call('stats')))
+    writer.close()
+    await writer.wait_closed()
+    if server:
+        await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the multi-game chess server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help="server port (default: start a server in-process)")
+    parser.add_argument('--clients', type=int, default=100, help="concurrent connections")
+    parser.add_argument('--games', type=int, default=1, help="games per client, played one after another")
+    parser.add_argument('--max-plies', type=int, default=80, help="plies after which a game is abandoned")
+    parser.add_argument('--depth', type=int, default=1, help="engine depth for the bot")
+    parser.add_argument('--seed', type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
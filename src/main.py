@@ -1,9 +1,12 @@
 import pygame
+import math
 import sys
+import time
 
 # 1. Foundation
 import constants
 import state
+import sprites
 
 # 2. Logic & Models
 import models
@@ -15,29 +18,79 @@ import engine
 import uci_utils
 import ai_agent
 import input_handler
+import ai_interface
+import profiling
 
 # Connect engine and ai_agent to avoid circularity
 engine.set_ai_agent_module(ai_agent)
 
+IDLE_WAKE_MS = 1000         # Longest the loop sleeps with nothing scheduled (a safety net)
+DEV_OVERLAY_REFRESH_MS = 250  # Developer overlay refresh while it is shown
+WAKE_EVENT = pygame.event.custom_type()  # Posted by background threads through state.wake_ui
+
+def post_wake():
+    """Wakes the main loop from any thread."""
+    try:
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+    except pygame.error:
+        pass  # Display already closed
+
+def next_wake_ms():
+    """Milliseconds until the screen changes by itself: the clock's next second or the cursor blink."""
+    import ui_renderer
+    waits = [IDLE_WAKE_MS]
+    if state.timer_active:
+        clock = state.white_time if state.position.turn == 'white' else state.black_time
+        waits.append(int((clock - math.floor(clock)) * 1000) + 1)
+    if state.ai_coach_streaming:
+        blink = ui_renderer.CURSOR_BLINK_MS
+        waits.append(blink - pygame.time.get_ticks() % blink)
+    if profiling.enabled:
+        waits.append(DEV_OVERLAY_REFRESH_MS)
+    return max(1, min(waits))
+
+def toggle_dev_overlay():
+    """F3: shows or hides frame timings; timing is only collected while it is shown."""
+    import ui_renderer
+    profiling.enabled = not profiling.enabled
+    profiling.reset()
+    ui_renderer.invalidate('board')
+    print(f"--- Developer overlay {'on' if profiling.enabled else 'off'} ---")
+
+def init_display():
+    """Starts pygame and opens the window; the game logic itself never needs a display."""
+    pygame.init()
+    state.screen = pygame.display.set_mode((constants.WINDOW_W, constants.WINDOW_H))
+    pygame.display.set_caption("Chess AI — Grandmaster Coach")
+    pygame.event.set_blocked(pygame.MOUSEMOTION)  # Nothing tracks the pointer; don't wake for it
+    state.wake_ui = post_wake
+    ai_interface.status_listener = post_wake
+    sprites.preload(constants.SQUARE_SIZE)
+
 def start_chess_game():
     """Initializes and runs the main game loop."""
+    init_display()
     board_manager.initialize_game_board()
-    throttle = pygame.time.Clock()
-
-    ui_rects = {
-        'hint': pygame.Rect(0, 0, 1, 1),
-        'bot_tog': pygame.Rect(0, 0, 1, 1),
-        'clock_tog': pygame.Rect(0, 0, 1, 1),
-        'presets': []
-    }
+    engine.refresh_analysis()
 
     import ui_renderer # Import inside to ensure state.screen is ready
 
+    ui_rects, _ = ui_renderer.draw_frame()  # First frame draws every panel
+    pygame.display.flip()
+
+    last_tick = time.monotonic()
     while True:
+        # Sleep until input, a background result (WAKE_EVENT) or the next clock second
+        events = [pygame.event.wait(next_wake_ms())]
+        events += pygame.event.get()
+        profiling.begin_frame()
+
         # --- Timer Logic ---
-        dt = throttle.tick(60) / 1000.0  # seconds
+        now = time.monotonic()
+        dt = now - last_tick  # seconds
+        last_tick = now
         if state.timer_active:
-            if state.current_turn_color == 'white':
+            if state.position.turn == 'white':
                 state.white_time -= dt
             else:
                 state.black_time -= dt
@@ -50,48 +103,47 @@ def start_chess_game():
                 print("--- TIME OUT! White wins on time ---")
                 state.timer_active = False
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                input_handler.handle_mouse_input(pygame.mouse.get_pos(), ui_rects)
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_u:
-                    engine.undo_move()
+        with profiling.section('events'):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    pygame.quit(); sys.exit()
+                elif event.type == pygame.WINDOWEXPOSED:
+                    ui_renderer.invalidate()
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    input_handler.handle_mouse_input(pygame.mouse.get_pos(), ui_rects)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_u:
+                        engine.undo_move()
+                    elif event.key == pygame.K_F3:
+                        toggle_dev_overlay()
+                    elif event.key == pygame.K_F4:
+                        profiling.start_capture()
 
-        # --- Poll for pending AI move (set by background thread) ---
+        # --- Pending AI move (set by a background thread, which also woke us) ---
         if state.pending_ai_move is not None:
-            start_pos, end_pos = state.pending_ai_move
-            state.pending_ai_move = None          # Consume it immediately
-            
-            piece = state.board[start_pos[0]][start_pos[1]]
-            if piece and piece.color == 'black':
-                # Set globals for engine to consume
-                state.active_selected_piece = piece
-                state.active_selected_pos = start_pos
-                state.legal_moves_for_selected = []
-                
-                engine.execute_move(end_pos[0], end_pos[1])
-                
-                state.active_selected_piece = None
-                state.active_selected_pos = None
-                print(f"--- AI moved: {start_pos} -> {end_pos} ---")
-
-        # --- Rendering ---
-        state.screen.fill(constants.BG_DARK)
-        
-        ui_renderer.draw_topbar()
-        ui_renderer.draw_chess_board()
-        ui_renderer.draw_all_pieces()
-        ui_renderer.draw_bottom_bar()
-        
-        new_rects = ui_renderer.draw_sidebar()
-        if new_rects:
-            ui_rects = new_rects
-            
-        ui_renderer.draw_history_panel()
-            
-        pygame.display.flip()
+            with profiling.section('ai_move'):
+                start_pos, end_pos = state.pending_ai_move
+                state.pending_ai_move = None          # Consume it immediately
+
+                piece = state.position.board[start_pos[0]][start_pos[1]]
+                if not move_logic.is_legal_move(state.position, start_pos, end_pos):
+                    print(f"--- AI move rejected as illegal: {start_pos} -> {end_pos} ---")
+                elif piece and piece.color == 'black':
+                    state.active_selected_piece = None
+                    state.active_selected_pos = None
+                    state.legal_moves_for_selected = []
+                    engine.execute_move(start_pos, end_pos)
+                    print(f"--- AI moved: {start_pos} -> {end_pos} ---")
+
+        # --- Rendering: only panels whose state changed ---
+        if profiling.enabled:
+            ui_renderer.invalidate('board')  # The overlay sits on the board
+        ui_rects, dirty = ui_renderer.draw_frame()
+        if profiling.enabled:
+            dirty.append(ui_renderer.draw_dev_overlay())
+        if dirty:
+            pygame.display.update(dirty)
+        profiling.end_frame()
 
 if __name__ == "__main__":
     start_chess_game()
\ No newline at end of file
@@ -1,14 +1,16 @@
-import pygame
-import constants
-
 class ChessPiece:
-    def __init__(self, color, type_name, image_path):
+    """A piece on the board: plain data. Its picture comes from sprites.get(*sprite_key, size)."""
+    __slots__ = ('color', 'type', 'has_moved')
+
+    def __init__(self, color, type_name):
         self.color = color
         self.type = type_name
-        self.image = pygame.image.load(image_path)
-        self.image = pygame.transform.scale(self.image, (constants.SQUARE_SIZE, constants.SQUARE_SIZE))
         self.has_moved = False
 
+    @property
+    def sprite_key(self):
+        return (self.color, self.type)
+
 class MoveRecord:  
     """ for undo move"""
     """Stores all information needed to reverse a chess move."""
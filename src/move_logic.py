@@ -1,40 +1,42 @@
-import state
-from move_physics import get_raw_piece_moves, is_king_in_check, is_cell_attacked
+import bitboard
+import profiling
 
-def get_fully_legal_moves(piece, row, col):
-    """Refines raw moves with safety checks to ensure the King isn't left in Check."""
-    raw_moves = get_raw_piece_moves(piece, row, col)
-    legal_moves = []
+@profiling.timed('movegen')
+def generate_all_legal_moves(position):
+    """
+    Every legal move as (from_sq, to_sq, promo) for the side to move.
+    Memoized on the position until its Zobrist key changes.
+    """
+    return position.legal_moves()
 
-    # Filter out moves that would cause self-check
-    for target_r, target_c in raw_moves:
-        original_piece = state.board[target_r][target_c]
-        
-        # Simulate move
-        state.board[target_r][target_c] = piece
-        state.board[row][col] = None
-        is_safe = not is_king_in_check(piece.color)
-        
-        if is_safe:
-            legal_moves.append((target_r, target_c))
-            
-        # Revert simulation else condition
-        state.board[row][col] = piece
-        state.board[target_r][target_c] = original_piece
+def generate_legal_moves_for(position, color):
+    """
+    Legal moves for either colour. For the side not to move the turn is
+    flipped on a bitboard copy (with no en passant right) and generated once.
+    """
+    if color == position.turn:
+        return generate_all_legal_moves(position)
+    pos = position.to_bitboard()
+    pos.turn = bitboard.COLOR_INDEX[color]
+    pos.ep_square = None
+    return pos.legal_moves()
 
-    # Specialized Castling Logic
-    if piece.type == 'king' and not piece.has_moved and not is_king_in_check(piece.color):
-        # Kingside (Right)
-        rook_r = state.board[row][7]
-        if rook_r and rook_r.type == 'rook' and not rook_r.has_moved:
-            if state.board[row][5] is None and state.board[row][6] is None:
-                if not is_cell_attacked(row, 5, piece.color) and not is_cell_attacked(row, 6, piece.color):
-                    legal_moves.append((row, 6))
-        # Queenside (Left)
-        rook_l = state.board[row][0]
-        if rook_l and rook_l.type == 'rook' and not rook_l.has_moved:
-            if state.board[row][1] is None and state.board[row][2] is None and state.board[row][3] is None:
-                if not is_cell_attacked(row, 2, piece.color) and not is_cell_attacked(row, 3, piece.color):
-                    legal_moves.append((row, 2))
+def is_legal_move(position, start_pos, end_pos):
+    """True if moving from start_pos to end_pos is legal in the position."""
+    from_sq, to_sq = bitboard.square(*start_pos), bitboard.square(*end_pos)
+    return any(m[0] == from_sq and m[1] == to_sq for m in generate_all_legal_moves(position))
 
+def get_fully_legal_moves(position, row, col):
+    """Legal target squares for the piece at (row, col), from the pin/check-mask generator."""
+    piece = position.board[row][col]
+    if piece is None:
+        return []
+    moves = generate_legal_moves_for(position, piece.color)
+    from_sq = bitboard.square(row, col)
+    legal_moves = []
+    for move_from, move_to, _ in moves:
+        target = bitboard.cell(move_to)
+        # Promotions appear once per piece type; the board only needs the square
+        if move_from == from_sq and target not in legal_moves:
+            legal_moves.append(target)
     return legal_moves
@@ -0,0 +1,265 @@
+"""
+A complete game position as an explicit value: board, side to move, en
+passant target, move history and Zobrist key.
+
+Rules code takes a Position argument instead of reading module globals,
+so any number of positions can be examined at once (threads, processes,
+servers). state.position is just the one the GUI is showing. make() and
+unmake() mutate in place; copy() gives an independent position to search
+or hand to another thread.
+"""
+import copy as _copy
+
+import profiling
+import zobrist
+import uci_utils
+from bitboard import (BitboardPosition, board_castling_rights, bits_to_cells, cell, COLOR_NAMES, PIECE_NAMES,
+                      CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ)
+from models import ChessPiece, MoveRecord
+
+BACK_RANK = ('rook', 'knight', 'bishop', 'queen', 'king', 'bishop', 'knight', 'rook')
+
+class PositionFacts:
+    """
+    What the GUI and game_status ask about a position, stamped with the
+    Zobrist key it was worked out for.
+    """
+    def __init__(self, key, king, checkers, legal_count):
+        self.key = key
+        self.king = king                # (row, col) of the side to move's king, or None
+        self.checkers = checkers        # (row, col) of every piece giving check
+        self.in_check = bool(checkers)
+        self.legal_count = legal_count
+
+    @property
+    def status(self):
+        """'ongoing', 'checkmate' or 'stalemate' (repetition needs the game's history)."""
+        if self.legal_count:
+            return 'ongoing'
+        return 'checkmate' if self.in_check else 'stalemate'
+
+class Position:
+    def __init__(self, board=None, turn='white', en_passant_target=None):
+        self.board = board if board is not None else [[None] * 8 for _ in range(8)]
+        self.turn = turn                            # 'white' or 'black'
+        self.en_passant_target = en_passant_target  # (row, col) or None
+        self.history = []                           # MoveRecords, for unmake()
+        self.zobrist_key = zobrist.key_for_board(self.board, turn, en_passant_target)
+        self.key_history = [self.zobrist_key]       # Keys of every position reached
+        self._legal = (None, [])                    # (key, legal moves) memo behind legal_moves()
+        self._bitboard = (None, None)               # (key, BitboardPosition) snapshot memo
+        self._facts = None                          # PositionFacts for the current key
+
+    @classmethod
+    def initial(cls):
+        """The standard starting position; every piece is its own object."""
+        board = [[None] * 8 for _ in range(8)]
+        for col, type_name in enumerate(BACK_RANK):
+            board[0][col] = ChessPiece('black', type_name)
+            board[1][col] = ChessPiece('black', 'pawn')
+            board[6][col] = ChessPiece('white', 'pawn')
+            board[7][col] = ChessPiece('white', type_name)
+        return cls(board)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        A position set up from a FEN string (move counters are ignored).
+        Castling rights become has_moved flags: kings and rooks count as
+        moved unless a right says otherwise.
+        """
+        pos = BitboardPosition.from_fen(fen)
+        board = [[None] * 8 for _ in range(8)]
+        for sq in range(64):
+            found = pos.piece_at(sq)
+            if found:
+                row, col = cell(sq)
+                piece = board[row][col] = ChessPiece(COLOR_NAMES[found[0]], PIECE_NAMES[found[1]])
+                piece.has_moved = piece.type in ('king', 'rook')
+        for right, row, rook_col in ((CASTLE_WK, 7, 7), (CASTLE_WQ, 7, 0), (CASTLE_BK, 0, 7), (CASTLE_BQ, 0, 0)):
+            king, rook = board[row][4], board[row][rook_col]
+            if pos.castling & right and king and rook:
+                king.has_moved = rook.has_moved = False
+        ep = cell(pos.ep_square) if pos.ep_square is not None else None
+        return cls(board, COLOR_NAMES[pos.turn], ep)
+
+    def copy(self):
+        """Independent deep copy, including history, so unmake() works on it too."""
+        memo = {id(self._legal): self._legal, id(self._bitboard): self._bitboard,
+                id(self._facts): self._facts}  # Immutable memos; share them
+        return _copy.deepcopy(self, memo)
+
+    def piece_at(self, row, col):
+        return self.board[row][col]
+
+    def castling_rights(self):
+        return board_castling_rights(self.board)
+
+    def snapshot(self):
+        """
+        The position as a BitboardPosition, built once per Zobrist key. It is
+        shared by every caller: read it, or use to_bitboard() to change it.
+        """
+        key, pos = self._bitboard
+        if key != self.zobrist_key:
+            pos = BitboardPosition.from_board(self.board, self.turn, self.en_passant_target)
+            self._bitboard = (self.zobrist_key, pos)
+        return pos
+
+    def to_bitboard(self):
+        """A private BitboardPosition copy, the form move generation works on."""
+        return self.snapshot().copy()
+
+    def legal_moves(self):
+        """Every legal move as (from_sq, to_sq, promo), generated once per Zobrist key."""
+        key, moves = self._legal
+        if key != self.zobrist_key:
+            moves = self.snapshot().legal_moves()
+            self._legal = (self.zobrist_key, moves)
+        return moves
+
+    @profiling.timed('movegen')
+    def facts(self):
+        """
+        Check, checkers, legal-move count and result for the side to move,
+        worked out once per position and reused until a move changes the key.
+        """
+        facts = self._facts
+        if facts is None or facts.key != self.zobrist_key:
+            pos = self.snapshot()
+            moves = self.legal_moves()
+            king = pos.king_square(pos.turn)
+            checkers = pos.attackers_to(king, pos.turn ^ 1) if king is not None else 0
+            facts = PositionFacts(self.zobrist_key, cell(king) if king is not None else None,
+                                  bits_to_cells(checkers), len(moves))
+            self._facts = facts
+        return facts
+
+    def make(self, start_pos, end_pos, promotion='queen'):
+        """
+        Plays a move (assumed legal), handling castling, en passant and
+        promotion, and updates the key incrementally. Returns the MoveRecord.
+        """
+        board = self.board
+        start_row, start_col = start_pos
+        target_row, target_col = end_pos
+        moving_piece = board[start_row][start_col]
+        captured_piece = board[target_row][target_col]
+        prev_en_passant = self.en_passant_target
+        prev_castling = board_castling_rights(board)
+        is_en_passant = False
+        is_castle_move = False
+        rook_move_info = None
+
+        # --- Side Effect: Castling ---
+        if moving_piece.type == 'king' and abs(target_col - start_col) == 2:
+            is_castle_move = True
+            old_rook_col = 7 if target_col == 6 else 0
+            new_rook_col = 5 if target_col == 6 else 3
+            rook = board[target_row][old_rook_col]
+            rook_move_info = (rook, (target_row, old_rook_col), (target_row, new_rook_col))
+
+            board[target_row][new_rook_col] = board[target_row][old_rook_col]
+            board[target_row][old_rook_col] = None
+            if rook:
+                rook.has_moved = True
+
+        # --- Side Effect: En Passant Capture ---
+        if moving_piece.type == 'pawn' and end_pos == self.en_passant_target:
+            is_en_passant = True
+            captured_piece = board[start_row][target_col]  # The captured pawn
+            board[start_row][target_col] = None
+
+        # --- Setup next turn's En Passant state ---
+        self.en_passant_target = None
+        if moving_piece.type == 'pawn' and abs(target_row - start_row) == 2:
+            self.en_passant_target = ((target_row + start_row) // 2, start_col)
+
+        # --- Finalize the Move ---
+        board[target_row][target_col] = moving_piece
+        board[start_row][start_col] = None
+        was_moved = moving_piece.has_moved
+        moving_piece.has_moved = True
+
+        # --- Promotion (queen unless told otherwise) ---
+        promoted_from = None
+        is_promo = False
+        if moving_piece.type == 'pawn' and target_row in (0, 7):
+            is_promo = True
+            promoted_from = moving_piece
+            board[target_row][target_col] = ChessPiece(moving_piece.color, promotion)
+
+        move_rec = MoveRecord(
+            start_pos, end_pos,
+            board[target_row][target_col],  # Could be promoted piece
+            captured_piece,
+            prev_en_passant,
+            is_en_passant=is_en_passant,
+            is_castle=is_castle_move,
+            rook_move=rook_move_info,
+            is_promotion=is_promo,
+            promoted_from=promoted_from
+        )
+        # The record was built after the move; keep the flags from before it
+        move_rec.piece_moved_had_moved = was_moved
+        if rook_move_info:
+            move_rec.rook_had_moved = False
+        self.history.append(move_rec)
+
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        self.zobrist_key ^= zobrist.move_key_delta(move_rec, prev_en_passant, self.en_passant_target,
+                                                   prev_castling, board_castling_rights(board))
+        self.key_history.append(self.zobrist_key)
+        if zobrist.DEBUG:
+            zobrist.verify(self.zobrist_key, board, self.turn, self.en_passant_target)
+        return move_rec
+
+    def unmake(self):
+        """Takes back the last move. Returns its MoveRecord, or None if there is none."""
+        if not self.history:
+            return None
+        board = self.board
+        move = self.history.pop()
+        ep_before_undo = self.en_passant_target
+        castling_before_undo = board_castling_rights(board)
+        selected_row, selected_col = move.start_pos
+        target_row, target_col = move.end_pos
+
+        # Restore piece position
+        board[selected_row][selected_col] = move.piece_moved
+        board[target_row][target_col] = move.captured_piece
+        move.piece_moved.has_moved = move.piece_moved_had_moved
+
+        # Restore En Passant capture
+        if move.is_en_passant:
+            # The captured pawn was at (selected_row, target_col)
+            board[selected_row][target_col] = move.captured_piece
+            board[target_row][target_col] = None
+
+        # Restore Castling Rook
+        if move.is_castle:
+            rook, r_start, r_end = move.rook_move
+            board[r_start[0]][r_start[1]] = rook
+            board[r_end[0]][r_end[1]] = None
+            if rook:
+                rook.has_moved = move.rook_had_moved
+
+        # Restore Promotion
+        if move.is_promotion:
+            board[selected_row][selected_col] = move.promoted_from
+            move.promoted_from.has_moved = move.piece_moved_had_moved
+
+        self.en_passant_target = move.prev_en_passant
+        self.turn = 'white' if self.turn == 'black' else 'black'
+
+        # Reverse the position key with the same XOR delta
+        self.zobrist_key ^= zobrist.move_key_delta(move, move.prev_en_passant, ep_before_undo,
+                                                   board_castling_rights(board), castling_before_undo)
+        if len(self.key_history) > 1:
+            self.key_history.pop()
+        if zobrist.DEBUG:
+            zobrist.verify(self.zobrist_key, board, self.turn, self.en_passant_target)
+        return move
+
+    def to_fen(self):
+        return uci_utils.generate_fen(self)
@@ -0,0 +1,177 @@
+"""
+Developer timing: loop iteration times, named sections and cProfile captures.
+
+Sections are marked with the timed() decorator or the section() context
+manager. While timing is off (the default) they cost one flag check.
+main turns timing on with the developer overlay (F3) and starts cProfile
+captures with F4. Section times are inclusive. Calls from the main thread
+are charged to the current frame; calls from engine and eval threads go
+into a separate per-second budget, so their load is visible too.
+"""
+import cProfile
+import functools
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+
+HISTORY_FRAMES = 240                                      # frames kept for the histogram and averages
+HISTOGRAM_EDGES_MS = (1, 2, 4, 8, 16, 33, 50, 100)        # upper bucket edges; the last bucket is open
+PROFILE_FRAMES = int(os.getenv("PROFILE_FRAMES", "120"))  # frames in one F4 cProfile capture
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".")               # where captures are written
+
+enabled = False
+frame_times = deque(maxlen=HISTORY_FRAMES)     # seconds of work per loop iteration (waiting excluded)
+frame_sections = deque(maxlen=HISTORY_FRAMES)  # {section: seconds} per loop iteration
+frame_stamps = deque(maxlen=HISTORY_FRAMES)    # monotonic time each iteration ended
+
+_current = defaultdict(float)
+_frame_start = None
+_background = defaultdict(float)
+_background_since = time.monotonic()
+_background_rates = {}
+_lock = threading.Lock()
+
+_capture = None
+_capture_frames = 0
+_capture_left = 0
+last_capture = None  # Path of the most recent capture
+
+def record(name, seconds):
+    if threading.current_thread() is threading.main_thread():
+        _current[name] += seconds
+    else:
+        with _lock:
+            _background[name] += seconds
+
+def timed(name):
+    """Decorator: charges the function's run time to a named section."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+        return run
+    return decorate
+
+class section:
+    """Context manager form of timed(), for a block inside a function."""
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter() if enabled else None
+
+    def __exit__(self, *exc):
+        if self.started is not None:
+            record(self.name, time.perf_counter() - self.started)
+
+def begin_frame():
+    global _frame_start
+    _frame_start = time.perf_counter()
+    _current.clear()
+    if _capture is not None:
+        _capture.enable()
+
+def end_frame():
+    """Closes the frame; returns the file name when this frame finished a cProfile capture."""
+    global _frame_start
+    if _capture is not None:
+        _capture.disable()  # Waiting for the next event is not frame work
+    if _frame_start is not None and enabled:
+        frame_times.append(time.perf_counter() - _frame_start)
+        frame_sections.append(dict(_current))
+        frame_stamps.append(time.monotonic())
+    _frame_start = None
+    return _tick_capture()
+
+def percentile_ms(pct):
+    if not frame_times:
+        return 0.0
+    ordered = sorted(frame_times)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+def histogram():
+    """Frame counts per HISTOGRAM_EDGES_MS bucket, plus one for anything slower."""
+    counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+    for seconds in frame_times:
+        ms = seconds * 1000
+        i = 0
+        while i < len(HISTOGRAM_EDGES_MS) and ms > HISTOGRAM_EDGES_MS[i]:
+            i += 1
+        counts[i] += 1
+    return counts
+
+def frames_per_second():
+    """Loop iterations in the last second (the loop sleeps when idle, so this is low at rest)."""
+    now = time.monotonic()
+    return sum(1 for stamp in frame_stamps if now - stamp <= 1.0)
+
+def section_averages():
+    """{section: average ms per frame} on the main thread over the kept frames."""
+    if not frame_sections:
+        return {}
+    totals = defaultdict(float)
+    for sections in frame_sections:
+        for name, seconds in sections.items():
+            totals[name] += seconds
+    return {name: total * 1000 / len(frame_sections) for name, total in totals.items()}
+
+def background_rates():
+    """{section: ms per second} spent by other threads, refreshed about once a second."""
+    global _background_since, _background_rates
+    now = time.monotonic()
+    elapsed = now - _background_since
+    if elapsed >= 1.0:
+        with _lock:
+            _background_rates = {name: seconds * 1000 / elapsed for name, seconds in _background.items()}
+            _background.clear()
+        _background_since = now
+    return _background_rates
+
+def reset():
+    frame_times.clear()
+    frame_sections.clear()
+    frame_stamps.clear()
+    with _lock:
+        _background.clear()
+
+# --- cProfile captures (main thread only, as cProfile is per thread) ---
+# The profiler runs only between begin_frame() and end_frame(), so time
+# spent blocked in pygame.event.wait() stays out of the capture.
+def capturing():
+    """(frames done, frames wanted) while a capture runs, else None."""
+    if _capture is None:
+        return None
+    return _capture_frames - _capture_left, _capture_frames
+
+def start_capture(frames=PROFILE_FRAMES):
+    global _capture, _capture_frames, _capture_left
+    if _capture is not None:
+        return
+    _capture_frames = _capture_left = frames
+    _capture = cProfile.Profile()
+    if _frame_start is not None:
+        _capture.enable()  # Record the rest of this frame; begin_frame() does the next ones
+    print(f"--- Profiling the next {frames} frames ---")
+
+def _tick_capture():
+    global _capture, _capture_left, last_capture
+    if _capture is None:
+        return None
+    _capture_left -= 1
+    if _capture_left > 0:
+        return None
+    path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.prof"))
+    _capture.dump_stats(path)
+    print(f"--- Profile of {_capture_frames} frames written to {path} (top functions by cumulative time) ---")
+    pstats.Stats(_capture).sort_stats('cumulative').print_stats(15)
+    _capture = None
+    last_capture = path
+    return path
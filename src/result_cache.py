@@ -0,0 +1,84 @@
+"""
+Two-tier key/value cache: an in-memory LRU for the session plus an optional
+SQLite file shared across runs. Values must be JSON-serialisable.
+The disk tier can be bounded (max_disk_entries); the least recently used
+rows are evicted first.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class TieredCache:
+    def __init__(self, name, capacity=4096, db_path=None, max_disk_entries=None):
+        self.name = name
+        self.capacity = capacity
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {name} (key TEXT PRIMARY KEY, value TEXT, updated REAL)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {name}_updated ON {name} (updated)")
+            self._db.commit()
+
+    def get(self, key):
+        """Returns the cached value or None, promoting disk hits into memory."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(f"SELECT value FROM {self.name} WHERE key = ?", (key,)).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    if self.max_disk_entries:
+                        # Keep eviction order least-recently-used, not least-recently-written
+                        self._db.execute(f"UPDATE {self.name} SET updated = ? WHERE key = ?", (time.time(), key))
+                        self._db.commit()
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def peek(self, key):
+        """Like get() but without touching LRU order or hit/miss counters."""
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(f"SELECT value FROM {self.name} WHERE key = ?", (key,)).fetchone()
+                if row:
+                    return json.loads(row[0])
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(f"INSERT OR REPLACE INTO {self.name} (key, value, updated) VALUES (?, ?, ?)",
+                                 (key, json.dumps(value), time.time()))
+                if self.max_disk_entries:
+                    self._evict_disk()
+                self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        count = self._db.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+        if count <= self.max_disk_entries:
+            return
+        # Trim to 90% so eviction runs once per batch of inserts, not on every one
+        excess = count - int(self.max_disk_entries * 0.9)
+        self._db.execute(f"DELETE FROM {self.name} WHERE key IN "
+                         f"(SELECT key FROM {self.name} ORDER BY updated LIMIT ?)", (excess,))
@@ -0,0 +1,288 @@
+"""
+Multi-game chess server: many concurrent games in one asyncio process.
+
+Protocol: newline-delimited JSON over TCP. Each request is an object with
+an "op" and an optional "id" that is echoed back in the response.
+
+    {"op": "new", "bot": "black", "depth": 8}   -> {"game": 1, "fen": ..., "legal": [...]}
+    {"op": "move", "game": 1, "move": "e2e4"}   -> game snapshot, plus "reply" if the bot moved
+    {"op": "hint", "game": 1}                   -> {"move", "eval", "depth", "pv"}
+    {"op": "eval", "game": 1}                   -> {"eval", "score", "depth"}
+    {"op": "state" | "legal" | "undo" | "close", "game": 1}
+    {"op": "stats"}                             -> games/sec, move latency percentiles
+
+Clients only move the side the bot does not play. Against the bot, undo
+also takes back the bot's reply, so the client is to move again.
+
+Engine work from every game is multiplexed onto the shared Stockfish pool
+through a thread executor (bot moves first, then hints, then evals). Each
+client connection is a session with a bounded request queue: when it is
+full the server stops reading from that client until it catches up.
+Without an engine the bot plays a random legal move.
+
+Usage:
+    python src/server.py --port 8765
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_interface import analyse_position, SEARCH_DEPTH, PRIORITY_BOT, PRIORITY_EVAL
+from engine_pool import PRIORITY_HINT
+from game_session import GameSession, IllegalMove
+
+DEFAULT_PORT = 8765
+QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "16"))  # pending requests per client before reads pause
+LATENCY_SAMPLES = 10000                                 # recent move latencies kept for percentiles
+GAME_OPS = ('move', 'hint', 'eval', 'state', 'legal', 'undo', 'close')
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class ServerStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.games_started = 0
+        self.games_finished = 0
+        self.moves = 0
+        self.requests = 0
+        self.engine_fallbacks = 0
+        self.move_latencies = []
+
+    def record_move(self, seconds):
+        self.moves += 1
+        self.move_latencies.append(seconds)
+        if len(self.move_latencies) > LATENCY_SAMPLES:
+            del self.move_latencies[:len(self.move_latencies) - LATENCY_SAMPLES]
+
+    def report(self, active_games):
+        elapsed = time.monotonic() - self.started
+        ms = lambda pct: round(percentile(self.move_latencies, pct) * 1000, 2) if self.move_latencies else None
+        return {
+            'uptime': round(elapsed, 2),
+            'active_games': active_games,
+            'games_started': self.games_started,
+            'games_finished': self.games_finished,
+            'games_per_sec': round(self.games_finished / elapsed, 2) if elapsed else 0.0,
+            'moves': self.moves,
+            'requests': self.requests,
+            'engine_fallbacks': self.engine_fallbacks,
+            'move_latency_ms': {'p50': ms(50), 'p95': ms(95), 'p99': ms(99)},
+        }
+
+class ClientSession:
+    """One connection: its request queue and the games it created."""
+    def __init__(self, reader, writer, queue_size):
+        self.reader = reader
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.games = set()
+
+class ChessServer:
+    def __init__(self, depth=SEARCH_DEPTH, queue_size=QUEUE_SIZE, workers=None):
+        self.depth = depth
+        self.queue_size = queue_size
+        self.games = {}
+        self.stats = ServerStats()
+        self._ids = itertools.count(1)
+        self._counted = set()  # Games already counted as finished
+        self._clients = set()  # Connection handler tasks, awaited by close()
+        self._tcp = None
+        # Threads only wait on engines; the pool itself decides who searches next
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(64, (os.cpu_count() or 2) * 8))
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Starts listening; port 0 picks a free port. Returns the asyncio server."""
+        self._tcp = await asyncio.start_server(self.handle_client, host, port)
+        return self._tcp
+
+    async def close(self):
+        """Stops listening and waits for connected clients to be served and disconnect."""
+        self._tcp.close()
+        await self._tcp.wait_closed()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        task.add_done_callback(self._clients.discard)
+        session = ClientSession(reader, writer, self.queue_size)
+        worker = asyncio.create_task(self._serve(session))
+        try:
+            while True:
+                line = await reader.readline()
+                # Waits while the queue is full, so a flooding client is throttled by TCP
+                if not line or not await self._enqueue(session, worker, line):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Let queued requests finish, unless the worker already died on a broken pipe
+            await self._enqueue(session, worker, None)
+            await asyncio.gather(worker, return_exceptions=True)
+            for game_id in session.games:
+                self._end_game(game_id)
+            writer.close()
+
+    async def _enqueue(self, session, worker, item):
+        """Queues item for the session's worker; False if the worker has stopped."""
+        put = asyncio.ensure_future(session.queue.put(item))
+        await asyncio.wait({put, worker}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            return False
+        return True
+
+    async def _serve(self, session):
+        """Answers one session's requests in order."""
+        while True:
+            line = await session.queue.get()
+            if line is None:
+                return
+            try:
+                request = json.loads(line)
+                response = await self.dispatch(session, request)
+                if 'id' in request:
+                    response['id'] = request['id']
+            except (ValueError, KeyError, TypeError) as e:
+                response = {'error': str(e)}
+            try:
+                session.writer.write((json.dumps(response) + '\n').encode())
+                await session.writer.drain()
+            except ConnectionError:
+                return
+
+    async def dispatch(self, session, request):
+        self.stats.requests += 1
+        op = request['op']
+        if op == 'stats':
+            return self.stats.report(len(self.games))
+        if op == 'new':
+            return await self._new_game(session, request)
+        if op not in GAME_OPS:
+            return {'error': f"unknown op: {op}"}
+
+        game = self.games.get(request.get('game'))
+        if game is None or game.game_id not in session.games:
+            return {'error': f"unknown game: {request.get('game')}"}
+        if op == 'move':
+            return await self._move(game, request['move'])
+        if op == 'hint':
+            result = await self._analyse(game, PRIORITY_HINT)
+            if result is None:
+                return {'error': 'engine unavailable'}
+            return {'move': result['move'], 'eval': result['eval'], 'depth': result['depth'], 'pv': result['pv']}
+        if op == 'eval':
+            result = await self._analyse(game, PRIORITY_EVAL)
+            if result is None:
+                return {'error': 'engine unavailable'}
+            return {'eval': result['eval'], 'score': result['score'], 'depth': result['depth']}
+        if op == 'state':
+            return game.snapshot()
+        if op == 'legal':
+            return {'legal': game.legal_moves()}
+        if op == 'undo':
+            game.undo()
+            response = {}
+            if game.bot_to_move():  # The bot moved first and that move was taken back
+                response['reply'] = await self._bot_move(game)
+            response.update(game.snapshot())
+            return response
+        if op == 'close':
+            session.games.discard(game.game_id)
+            self._end_game(game.game_id)
+            return {'closed': game.game_id}
+
+    async def _new_game(self, session, request):
+        bot = request.get('bot')
+        if bot not in (None, 'white', 'black'):
+            return {'error': f"bot must be 'white', 'black' or null, not {bot!r}"}
+        depth = request.get('depth', self.depth)
+        if isinstance(depth, bool) or not isinstance(depth, int) or depth < 1:
+            return {'error': f"depth must be a positive integer, not {depth!r}"}
+        game = GameSession(next(self._ids), bot, depth)
+        self.games[game.game_id] = game
+        session.games.add(game.game_id)
+        self.stats.games_started += 1
+        response = {}
+        if game.bot_to_move():
+            response['reply'] = await self._bot_move(game)
+        response.update(game.snapshot())
+        return response
+
+    async def _move(self, game, uci):
+        started = time.monotonic()
+        if game.bot_to_move():
+            return {'error': "it is the bot's turn"}
+        try:
+            game.play(uci)
+        except IllegalMove as e:
+            return {'error': str(e)}
+        response = {}
+        if game.bot_to_move():
+            response['reply'] = await self._bot_move(game)
+        response.update(game.snapshot())
+        if response['status'] != 'ongoing':
+            self._count_finished(game.game_id)
+        self.stats.record_move(time.monotonic() - started)
+        return response
+
+    def _count_finished(self, game_id):
+        """A game counts as finished once: when it ends by the rules or is closed/abandoned."""
+        if game_id not in self._counted:
+            self._counted.add(game_id)
+            self.stats.games_finished += 1
+
+    def _end_game(self, game_id):
+        if self.games.pop(game_id, None) is not None:
+            self._count_finished(game_id)
+        self._counted.discard(game_id)
+
+    async def _analyse(self, game, priority):
+        loop = asyncio.get_running_loop()
+        fen = game.position.to_fen()
+        return await loop.run_in_executor(self.executor, analyse_position, fen, priority, game.depth)
+
+    async def _bot_move(self, game):
+        result = await self._analyse(game, PRIORITY_BOT)
+        move = result['move'] if result else None
+        if move not in game.legal_moves():
+            # No engine (or a stale answer): keep the game going with any legal move
+            self.stats.engine_fallbacks += 1
+            move = random.choice(game.legal_moves())
+        game.play(move)
+        return move
+
+async def serve(host, port, depth, on_listening=None):
+    """Serves until cancelled. Port 0 picks a free port; on_listening(port) is told which."""
+    server = ChessServer(depth=depth)
+    tcp = await server.start(host, port)
+    port = tcp.sockets[0].getsockname()[1]
+    print(f"--- Chess server listening on {host}:{port} (queue {server.queue_size} per client) ---")
+    if on_listening:
+        on_listening(port)
+    async with tcp:
+        await tcp.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-game chess server (JSON lines over TCP).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--depth', type=int, default=SEARCH_DEPTH, help="default engine depth per game")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.depth))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Speculative bot replies, computed while the human is thinking.
+
+A MultiPV search predicts the human's likeliest moves; the bot's answer to
+each resulting position is searched in advance and stored under that
+position's Zobrist key. When the human plays one of them, perform_ai_turn
+takes the stored move without searching at all.
+"""
+import os
+import threading
+
+import state
+import bitboard
+import zobrist
+from ai_interface import analyse_multipv, analyse_position, SEARCH_DEPTH, PRIORITY_EVAL
+
+REPLY_COUNT = int(os.getenv("SPECULATE_REPLIES", "3"))       # human moves to predict
+PREDICT_DEPTH = int(os.getenv("SPECULATE_DEPTH", "10"))      # depth of the MultiPV prediction
+
+class ReplySpeculator:
+    def __init__(self, reply_count=REPLY_COUNT, predict_depth=PREDICT_DEPTH):
+        self.reply_count = reply_count
+        self.predict_depth = predict_depth
+        self.hits = 0
+        self.misses = 0
+        self._answers = {}
+        self._parent = None  # Key of the position the current answers were prepared from
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def start(self, fen, key, on_finished=None):
+        """Precomputes bot answers to the predicted replies from fen (human to move)."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._answers = {}
+            self._parent = key
+
+        def is_stale():
+            return generation != self._generation or state.position.zobrist_key != key
+
+        def run():
+            try:
+                self._speculate(fen, is_stale)
+            finally:
+                if on_finished and not is_stale():
+                    on_finished()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop(self):
+        """Abandons in-flight speculation; answers already stored are kept."""
+        with self._lock:
+            self._generation += 1
+
+    def _speculate(self, fen, is_stale):
+        lines = analyse_multipv(fen, self.reply_count, self.predict_depth, PRIORITY_EVAL, is_stale)
+        if lines and not is_stale():
+            state.ai_eval_score = lines[0]['eval']
+            state.wake_ui()
+        root = bitboard.BitboardPosition.from_fen(fen)
+        for line in lines:
+            if is_stale():
+                return
+            child = root.apply(bitboard.move_from_uci(line['move']))
+            result = analyse_position(child.to_fen(), PRIORITY_EVAL, SEARCH_DEPTH, is_stale)
+            if result and result['move'] and not result.get('stopped'):
+                with self._lock:
+                    self._answers[zobrist.compute_key(child)] = result['move']
+
+    def take(self, key, parent_key):
+        """
+        The precomputed bot move for the position key, reached by one human
+        move from parent_key, or None. Only lookups after a start() from
+        parent_key count towards the hit rate.
+        """
+        with self._lock:
+            move = self._answers.pop(key, None)
+            if parent_key is not None and parent_key == self._parent:
+                self._parent = None  # One lookup per speculation
+                if move:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return move
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+speculator = ReplySpeculator()
@@ -0,0 +1,45 @@
+"""
+Sprite atlas for the pieces.
+
+Each image is decoded from disk once, then scaled and converted to the
+display's pixel format once per square size. Every piece of the same
+colour and type blits the same Surface, so starting a new game or
+promoting a pawn never touches the disk.
+"""
+import os
+import pygame
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+COLORS = ('white', 'black')
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+_sources = {}  # (color, type) -> Surface as loaded from disk
+_atlas = {}    # (color, type, size) -> scaled, converted Surface
+
+def image_path(color, type_name):
+    return os.path.join(IMAGE_DIR, f'{color}_{type_name}.png')
+
+def get(color, type_name, size):
+    """The sprite for a piece at the given square size, built on first use."""
+    key = (color, type_name, size)
+    surface = _atlas.get(key)
+    if surface is None:
+        source = _sources.get((color, type_name))
+        if source is None:
+            source = _sources[(color, type_name)] = pygame.image.load(image_path(color, type_name))
+        surface = pygame.transform.scale(source, (size, size))
+        if pygame.display.get_surface() is not None:
+            # Matching the display format makes every blit a plain copy
+            surface = surface.convert_alpha()
+        _atlas[key] = surface
+    return surface
+
+def preload(size):
+    """Builds all twelve sprites for a square size, e.g. right after the window opens."""
+    for color in COLORS:
+        for type_name in PIECE_TYPES:
+            get(color, type_name, size)
+
+def clear():
+    _sources.clear()
+    _atlas.clear()
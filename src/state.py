@@ -1,27 +1,28 @@
-import pygame
-import constants
-
-# --- Initial Setup ---
-pygame.init()
-
-# The 8x8 chess board. It stores ChessPiece objects or None for empty squares.
-board = [[None for _ in range(8)] for _ in range(8)]
+from position import Position
 
 # --- Global Game State ---
-current_turn_color = 'white'  # Current player color: 'white' or 'black'
+# The game on screen: board, side to move, en passant, history and Zobrist key.
+# Rules code takes a Position argument; only the GUI layer reads this one.
+position = Position.initial()
 active_selected_piece = None  # The piece object selected by the player
 active_selected_pos = None    # The (row, col) position of that piece
 legal_moves_for_selected = [] # Highlighted target squares for the UI
-pawn_en_passant_target = None # Square targeting an en passant capture
-move_history = []             # Stack to store move history for undoing
 
 # --- AI State ---
 ai_opponent_enabled = False
 ai_coach_message = "I am your coach. Make a move or click 'Hint'!"
+ai_coach_streaming = False  # True while coach text is still arriving
 ai_eval_score = "0.0"
 is_ai_thinking = False
 last_hint_move = ""   # e.g. "e2e4" – displayed below board
 pending_ai_move = None  # Set by background thread: ((sr,sc),(er,ec))
+pondering_enabled = True  # Analyse continuously while a human is to move
+
+def wake_ui():
+    """
+    Background threads call this after changing anything above, so the GUI
+    redraws without polling. The GUI replaces it; headless it does nothing.
+    """
 
 # --- Timer & History State ---
 timer_active = False
@@ -33,7 +34,5 @@ game_move_log = []            # List of strings: "1. White: E2-E4"
 # --- UI State ---
 current_theme_idx = 0
 
-# Create the screen
-# Create the screen (re-calculate width with new constants)
-screen = pygame.display.set_mode((constants.WINDOW_W, constants.WINDOW_H))
-pygame.display.set_caption("Chess AI — Grandmaster Coach")
+# The display surface; created by the GUI (main.init_display), None when headless
+screen = None
@@ -1,14 +1,17 @@
-from main import generate_fen, board, initialize_game_board
+import state
+from board_manager import initialize_game_board
+from uci_utils import generate_fen
 
 initialize_game_board()
 print("Starting position FEN:")
-print(generate_fen())
+print(generate_fen(state.position))
 
 # Simulate a move: e2-e4
+board = state.position.board
 pawn = board[6][4]
 board[4][4] = pawn
 board[6][4] = None
 pawn.has_moved = True
 
 print("\nAfter e4 move FEN:")
-print(generate_fen())
+print(generate_fen(state.position))
@@ -1,4 +1,4 @@
-import state
+import profiling
 
 def uci_to_grid(uci):
     """Translates UCI string (e2e4) to ((start_r, start_c), (end_r, end_c))."""
@@ -9,8 +9,9 @@ def uci_to_grid(uci):
     end_r = 8 - int(uci[3])
     return (start_r, start_c), (end_r, end_c)
 
-def generate_fen():
-    """Generates the FEN string for the current board state."""
+@profiling.timed('fen')
+def generate_fen(position):
+    """Generates the FEN string for the given position."""
     fen_parts = []
     
     # 1. Piece placement
@@ -26,7 +27,7 @@ def generate_fen():
         empty_count = 0
         row_str = ""
         for c in range(8):
-            p = state.board[r][c]
+            p = position.board[r][c]
             if p:
                 if empty_count > 0:
                     row_str += str(empty_count)
@@ -40,38 +41,38 @@ def generate_fen():
     fen_parts.append("/".join(rows))
     
     # 2. Side to move
-    fen_parts.append('w' if state.current_turn_color == 'white' else 'b')
+    fen_parts.append('w' if position.turn == 'white' else 'b')
     
     # 3. Castling ability
     castling = ""
     # White
-    wk = state.board[7][4]
+    wk = position.board[7][4]
     if wk and wk.type == 'king' and wk.color == 'white' and not wk.has_moved:
         # Kingside
-        wr_k = state.board[7][7]
+        wr_k = position.board[7][7]
         if wr_k and wr_k.type == 'rook' and wr_k.color == 'white' and not wr_k.has_moved:
             castling += "K"
         # Queenside
-        wr_q = state.board[7][0]
+        wr_q = position.board[7][0]
         if wr_q and wr_q.type == 'rook' and wr_q.color == 'white' and not wr_q.has_moved:
             castling += "Q"
     # Black
-    bk = state.board[0][4]
+    bk = position.board[0][4]
     if bk and bk.type == 'king' and bk.color == 'black' and not bk.has_moved:
         # Kingside
-        br_k = state.board[0][7]
+        br_k = position.board[0][7]
         if br_k and br_k.type == 'rook' and br_k.color == 'black' and not br_k.has_moved:
             castling += "k"
         # Queenside
-        br_q = state.board[0][0]
+        br_q = position.board[0][0]
         if br_q and br_q.type == 'rook' and br_q.color == 'black' and not br_q.has_moved:
             castling += "q"
     
     fen_parts.append(castling if castling else "-")
     
     # 4. En passant target square
-    if state.pawn_en_passant_target:
-        r, c = state.pawn_en_passant_target
+    if position.en_passant_target:
+        r, c = position.en_passant_target
         col_char = chr(ord('a') + c)
         row_char = str(8 - r)
         fen_parts.append(f"{col_char}{row_char}")
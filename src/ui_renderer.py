@@ -1,7 +1,12 @@
+import os
 import pygame
 import constants
 import state
-from move_physics import is_king_in_check
+import sprites
+import fonts
+import profiling
+
+CURSOR_BLINK_MS = 400  # Half-period of the streaming coach cursor
 
 def get_sq_rect(row, col):
     """Returns the pygame.Rect for a board square."""
@@ -9,18 +14,25 @@ def get_sq_rect(row, col):
     y = constants.BOARD_OFFSET_Y + row * constants.SQUARE_SIZE
     return pygame.Rect(x, y, constants.SQUARE_SIZE, constants.SQUARE_SIZE)
 
-def wrap_text(text, font, max_width):
-    """Simple word wrap for Pygame surfaces."""
-    words = str(text).split(' ')
-    lines = []
-    while words:
-        line_words = []
-        while words:
-            line_words.append(words.pop(0))
-            fw, _ = font.size(' '.join(line_words + words[:1]))
-            if fw > max_width:
-                break
-        lines.append(' '.join(line_words))
+# Wrapped coach text from the previous frame: (font name, width, text, lines)
+_coach_wrap = (None, None, "", [])
+
+def wrap_streaming_text(text, font_name, max_width):
+    """
+    fonts.wrap() for text that only grows at the end (a streaming coach
+    answer). Lines before the last one cannot change when words are
+    appended, so only the last line and the new words are re-wrapped.
+    """
+    global _coach_wrap
+    name, width, prev_text, prev_lines = _coach_wrap
+    if (name, width) == (font_name, max_width) and prev_lines and text.startswith(prev_text):
+        if text == prev_text:
+            return prev_lines
+        tail = prev_lines[-1] + text[len(prev_text):]
+        lines = prev_lines[:-1] + fonts.wrap_text(tail, fonts.get(font_name), max_width)
+    else:
+        lines = fonts.wrap(font_name, text, max_width)
+    _coach_wrap = (font_name, max_width, text, lines)
     return lines
 
 def format_time(seconds):
@@ -30,14 +42,14 @@ def format_time(seconds):
     secs = s % 60
     return f"{mins:02d}:{secs:02d}"
 
+@profiling.timed('draw_topbar')
 def draw_topbar():
     """Draws the top toolbar with board theme switcher."""
     pygame.draw.rect(state.screen, constants.BG_DARK, (0, 0, constants.WINDOW_W, constants.TOPBAR_HEIGHT))
     # Bottom border line
     pygame.draw.line(state.screen, constants.ACCENT, (0, constants.TOPBAR_HEIGHT - 1), (constants.WINDOW_W, constants.TOPBAR_HEIGHT - 1), 2)
 
-    font = pygame.font.SysFont('Segoe UI', 17, bold=True)
-    label = font.render("BOARD THEME:", True, constants.TEXT_DIM)
+    label = fonts.render('topbar', "BOARD THEME:", constants.TEXT_DIM)
     state.screen.blit(label, (10, 15))
 
     btn_w, btn_h = 80, 28
@@ -47,26 +59,74 @@ def draw_topbar():
         color = constants.ACCENT if i == state.current_theme_idx else (50, 52, 70)
         rect = pygame.Rect(x, btn_y, btn_w, btn_h)
         pygame.draw.rect(state.screen, color, rect, border_radius=6)
-        txt = font.render(name, True, constants.WHITE)
+        txt = fonts.render('topbar', name, constants.WHITE)
         state.screen.blit(txt, (rect.centerx - txt.get_width() // 2, rect.centery - txt.get_height() // 2))
         x += btn_w + 8
 
-def draw_chess_board():
-    """Renders the grid, highlights, coordinate labels."""
-    light, dark = constants.BOARD_THEMES[state.current_theme_idx]
+# --- Layers ---
+# The window is tiled by five panels. Each frame a panel is redrawn only when
+# its signature (the state it shows) has changed, and only the rects of the
+# redrawn panels are pushed to the display.
+# The topbar's 2px border line spills one pixel below it, so its panel is one row taller
+TOPBAR_REGION = pygame.Rect(0, 0, constants.SIDEBAR_X, constants.TOPBAR_HEIGHT + 1)
+BOARD_REGION = pygame.Rect(0, TOPBAR_REGION.bottom, constants.SIDEBAR_X, constants.BOARD_LABEL_SIZE + constants.BOARD_PX - 1)
+BOTTOM_REGION = pygame.Rect(0, BOARD_REGION.bottom, constants.SIDEBAR_X, constants.BOTTOM_BAR_HEIGHT)
+
+_board_layers = {}    # theme index -> Surface with the squares and coordinate labels
+_signatures = {}      # panel name -> signature it was last drawn with
+_sidebar_rects = {
+    'hint': pygame.Rect(0, 0, 1, 1),
+    'bot_tog': pygame.Rect(0, 0, 1, 1),
+    'clock_tog': pygame.Rect(0, 0, 1, 1),
+    'presets': []
+}
+
+def board_layer(theme_idx):
+    """The static part of the board region for a theme, drawn once."""
+    layer = _board_layers.get(theme_idx)
+    if layer is not None:
+        return layer
+    layer = pygame.Surface(BOARD_REGION.size)
+    if pygame.display.get_surface() is not None:
+        layer = layer.convert()
+    layer.fill(constants.BG_DARK)
+    light, dark = constants.BOARD_THEMES[theme_idx]
+    origin = (-BOARD_REGION.x, -BOARD_REGION.y)
 
     for row in range(8):
         for col in range(8):
-            sq_rect = get_sq_rect(row, col)
             square_color = light if (row + col) % 2 == 0 else dark
+            pygame.draw.rect(layer, square_color, get_sq_rect(row, col).move(origin))
+
+    # --- Coordinate Labels ---
+    files = 'ABCDEFGH'
+    for col in range(8):
+        # Column letters (A-H) above the board; the bottom bar covers the strip below it
+        sq_r = get_sq_rect(7, col)
+        txt = fonts.render('label', files[col], constants.TEXT_DIM)
+        x = sq_r.centerx - txt.get_width() // 2
+        layer.blit(txt, (x, constants.BOARD_OFFSET_Y - constants.BOARD_LABEL_SIZE + 2 - BOARD_REGION.y))
 
-            # Highlight king in check
-            p = state.board[row][col]
-            if p and p.type == 'king' and p.color == state.current_turn_color:
-                if is_king_in_check(state.current_turn_color):
-                    square_color = (210, 60, 60)
+    for row in range(8):
+        # Row numbers (8-1 from top) left of board
+        sq_r = get_sq_rect(row, 0)
+        txt = fonts.render('label', str(8 - row), constants.TEXT_DIM)
+        x = constants.BOARD_OFFSET_X - txt.get_width() - 3
+        y = sq_r.centery - txt.get_height() // 2
+        layer.blit(txt, (x, y - BOARD_REGION.y))
 
-            pygame.draw.rect(state.screen, square_color, sq_rect)
+    _board_layers[theme_idx] = layer
+    return layer
+
+@profiling.timed('draw_chess_board')
+def draw_chess_board():
+    """Renders the cached board layer, then the check, selection and move highlights."""
+    state.screen.blit(board_layer(state.current_theme_idx), BOARD_REGION.topleft)
+
+    # Highlight king in check (worked out once per position, not per frame)
+    facts = state.position.facts()
+    if facts.in_check:
+        pygame.draw.rect(state.screen, (210, 60, 60), get_sq_rect(*facts.king))
 
     # Selected piece highlight
     if state.active_selected_pos:
@@ -87,38 +147,18 @@ def draw_chess_board():
     board_rect = pygame.Rect(constants.BOARD_OFFSET_X, constants.BOARD_OFFSET_Y, constants.BOARD_PX, constants.BOARD_PX)
     pygame.draw.rect(state.screen, constants.ACCENT, board_rect, 2)
 
-    # --- Coordinate Labels ---
-    lbl_font = pygame.font.SysFont('Segoe UI', 14, bold=True)
-    files = 'ABCDEFGH'
-    for col in range(8):
-        # Column letters (A-H) below board
-        sq_r = get_sq_rect(7, col)
-        txt = lbl_font.render(files[col], True, constants.TEXT_DIM)
-        x = sq_r.centerx - txt.get_width() // 2
-        y = constants.BOARD_OFFSET_Y + constants.BOARD_PX + 4
-        state.screen.blit(txt, (x, y))
-        # Also draw at top
-        txt2 = lbl_font.render(files[col], True, constants.TEXT_DIM)
-        state.screen.blit(txt2, (x, constants.BOARD_OFFSET_Y - constants.BOARD_LABEL_SIZE + 2))
-
-    for row in range(8):
-        # Row numbers (8-1 from top) left of board
-        sq_r = get_sq_rect(row, 0)
-        num = str(8 - row)
-        txt = lbl_font.render(num, True, constants.TEXT_DIM)
-        x = constants.BOARD_OFFSET_X - txt.get_width() - 3
-        y = sq_r.centery - txt.get_height() // 2
-        state.screen.blit(txt, (x, y))
-
+@profiling.timed('draw_all_pieces')
 def draw_all_pieces():
-    """Draws piece images on top of the squares."""
+    """Draws piece sprites on top of the squares."""
+    size = constants.SQUARE_SIZE
     for row in range(8):
         for col in range(8):
-            p = state.board[row][col]
+            p = state.position.board[row][col]
             if p:
                 sq_rect = get_sq_rect(row, col)
-                state.screen.blit(p.image, sq_rect.topleft)
+                state.screen.blit(sprites.get(*p.sprite_key, size), sq_rect.topleft)
 
+@profiling.timed('draw_bottom_bar')
 def draw_bottom_bar():
     """Draws the bottom bar showing the last hint move."""
     bar_y = constants.TOPBAR_HEIGHT + constants.BOARD_LABEL_SIZE + constants.BOARD_PX
@@ -126,16 +166,16 @@ def draw_bottom_bar():
     pygame.draw.rect(state.screen, constants.BG_DARK, (0, bar_y, bar_w, constants.BOTTOM_BAR_HEIGHT))
     pygame.draw.line(state.screen, constants.ACCENT, (0, bar_y), (bar_w, bar_y), 1)
 
-    font = pygame.font.SysFont('Segoe UI', 16, bold=True)
     if state.last_hint_move:
-        prefix = font.render("Best Move:  ", True, constants.TEXT_DIM)
-        move_txt = font.render(state.last_hint_move.upper(), True, constants.YELLOW)
+        prefix = fonts.render('bottom', "Best Move:  ", constants.TEXT_DIM)
+        move_txt = fonts.render('bottom', state.last_hint_move.upper(), constants.YELLOW)
         state.screen.blit(prefix, (12, bar_y + 10))
         state.screen.blit(move_txt, (12 + prefix.get_width(), bar_y + 10))
     else:
-        hint_txt = font.render("Click \"GET HINT\" to see the best move.", True, constants.TEXT_DIM)
+        hint_txt = fonts.render('bottom', "Click \"GET HINT\" to see the best move.", constants.TEXT_DIM)
         state.screen.blit(hint_txt, (12, bar_y + 10))
 
+@profiling.timed('draw_sidebar')
 def draw_sidebar():
     """Renders the AI coach panel and Timer controls."""
     sb_y = 0
@@ -144,16 +184,10 @@ def draw_sidebar():
     pygame.draw.line(state.screen, constants.ACCENT, (constants.SIDEBAR_X, 0), (constants.SIDEBAR_X, sb_h), 2)
 
     pad = 16
-    font_title  = pygame.font.SysFont('Segoe UI', 24, bold=True)
-    font_med    = pygame.font.SysFont('Segoe UI', 18, bold=True)
-    font_small  = pygame.font.SysFont('Segoe UI', 15)
-    font_hint   = pygame.font.SysFont('Segoe UI', 13)
-    font_timer  = pygame.font.SysFont('Consolas', 26, bold=True)
-
     y = 12
 
     # --- Title ---
-    title_surf = font_title.render("\u265e  AI COACH", True, constants.ACCENT)
+    title_surf = fonts.render('title', "\u265e  AI COACH", constants.ACCENT)
     state.screen.blit(title_surf, (constants.SIDEBAR_X + pad, y))
     y += title_surf.get_height() + 4
     pygame.draw.line(state.screen, constants.ACCENT, (constants.SIDEBAR_X + pad, y), (constants.SIDEBAR_X + constants.SIDEBAR_WIDTH - pad, y), 1)
@@ -162,9 +196,9 @@ def draw_sidebar():
     # --- Timers (Top Section) ---
     if state.timer_active:
         # Black Timer
-        b_col = constants.DANGER if state.current_turn_color == 'black' else constants.TEXT_DIM
-        b_lbl = font_hint.render("BLACK TIME", True, b_col)
-        b_val = font_timer.render(format_time(state.black_time), True, b_col)
+        b_col = constants.DANGER if state.position.turn == 'black' else constants.TEXT_DIM
+        b_lbl = fonts.render('hint', "BLACK TIME", b_col)
+        b_val = fonts.render('timer', format_time(state.black_time), b_col)
         state.screen.blit(b_lbl, (constants.SIDEBAR_X + pad, y))
         state.screen.blit(b_val, (constants.SIDEBAR_X + constants.SIDEBAR_WIDTH - b_val.get_width() - pad, y - 5))
         y += b_lbl.get_height() + 20
@@ -173,8 +207,8 @@ def draw_sidebar():
     import ai_interface
     status_text = ai_interface.AI_STATUS
     status_color = constants.SUCCESS if "Ready" in status_text else (constants.DANGER if "Error" in status_text else constants.YELLOW)
-    lbl = font_hint.render("ENGINE STATUS", True, constants.TEXT_DIM)
-    val = font_med.render(status_text, True, status_color)
+    lbl = fonts.render('hint', "ENGINE STATUS", constants.TEXT_DIM)
+    val = fonts.render('medium', status_text, status_color)
     state.screen.blit(lbl, (constants.SIDEBAR_X + pad, y))
     y += lbl.get_height() + 2
     state.screen.blit(val, (constants.SIDEBAR_X + pad, y))
@@ -183,9 +217,8 @@ def draw_sidebar():
     # --- Evaluation ---
     eval_s = str(state.ai_eval_score)
     eval_color = constants.SUCCESS if eval_s.startswith('+') else (constants.DANGER if eval_s.startswith('-') else constants.YELLOW)
-    lbl_eval = font_hint.render("EVALUATION (White \u2192)", True, constants.TEXT_DIM)
-    eval_font = pygame.font.SysFont('Segoe UI', 30, bold=True)
-    val_eval = eval_font.render(eval_s, True, eval_color)
+    lbl_eval = fonts.render('hint', "EVALUATION (White \u2192)", constants.TEXT_DIM)
+    val_eval = fonts.render('eval', eval_s, eval_color)
     state.screen.blit(lbl_eval, (constants.SIDEBAR_X + pad, y))
     y += lbl_eval.get_height() + 2
     state.screen.blit(val_eval, (constants.SIDEBAR_X + pad, y))
@@ -194,7 +227,7 @@ def draw_sidebar():
     y += 8
 
     # --- Timer Settings ---
-    lbl = font_hint.render("TIMER SETTINGS", True, constants.TEXT_DIM)
+    lbl = fonts.render('hint', "TIMER SETTINGS", constants.TEXT_DIM)
     state.screen.blit(lbl, (constants.SIDEBAR_X + pad, y))
     y += lbl.get_height() + 4
     
@@ -203,7 +236,7 @@ def draw_sidebar():
     tog_col  = constants.SUCCESS if state.timer_active else (60, 65, 80)
     tog_rect = pygame.Rect(constants.SIDEBAR_X + pad, y, 110, 26)
     pygame.draw.rect(state.screen, tog_col, tog_rect, border_radius=5)
-    t_surf = font_hint.render(tog_text, True, constants.WHITE)
+    t_surf = fonts.render('hint', tog_text, constants.WHITE)
     state.screen.blit(t_surf, (tog_rect.centerx - t_surf.get_width() // 2, tog_rect.centery - t_surf.get_height() // 2))
     
     # Preset buttons
@@ -214,7 +247,7 @@ def draw_sidebar():
         p_rect = pygame.Rect(px, y, 45, 26)
         p_col  = constants.ACCENT if state.timer_initial_seconds == secs else (50, 52, 70)
         pygame.draw.rect(state.screen, p_col, p_rect, border_radius=5)
-        p_surf = font_hint.render(label, True, constants.WHITE)
+        p_surf = fonts.render('hint', label, constants.WHITE)
         state.screen.blit(p_surf, (p_rect.centerx - p_surf.get_width() // 2, p_rect.centery - p_surf.get_height() // 2))
         preset_rects.append((p_rect, secs))
         px += p_rect.width + 6
@@ -225,12 +258,12 @@ def draw_sidebar():
 
     # --- Mode ---
     bot_active = state.ai_opponent_enabled
-    lbl = font_hint.render("GAME MODE", True, constants.TEXT_DIM)
+    lbl = fonts.render('hint', "GAME MODE", constants.TEXT_DIM)
     state.screen.blit(lbl, (constants.SIDEBAR_X + pad, y))
     y += lbl.get_height() + 2
     mode_txt = "\u25cf  Bot Playing Black" if bot_active else "\u25cb  Local 2-Player"
     mode_col  = constants.SUCCESS if bot_active else constants.TEXT_DIM
-    mode_surf = font_med.render(mode_txt, True, mode_col)
+    mode_surf = fonts.render('medium', mode_txt, mode_col)
     state.screen.blit(mode_surf, (constants.SIDEBAR_X + pad, y))
     y += mode_surf.get_height() + 8
 
@@ -242,7 +275,7 @@ def draw_sidebar():
     # Hint button
     h_rect = pygame.Rect(btn_x, y, btn_w, btn_h)
     pygame.draw.rect(state.screen, constants.ACCENT, h_rect, border_radius=8)
-    h_txt = font_med.render("\u2192 GET HINT", True, constants.WHITE)
+    h_txt = fonts.render('medium', "\u2192 GET HINT", constants.WHITE)
     state.screen.blit(h_txt, (h_rect.centerx - h_txt.get_width() // 2, h_rect.centery - h_txt.get_height() // 2))
     y += btn_h + 8
 
@@ -251,7 +284,7 @@ def draw_sidebar():
     t_rect = pygame.Rect(btn_x, y, btn_w, btn_h)
     pygame.draw.rect(state.screen, t_color, t_rect, border_radius=8)
     t_label = "DISABLE BOT" if bot_active else "ENABLE BOT"
-    t_txt = font_med.render(t_label, True, constants.WHITE)
+    t_txt = fonts.render('medium', t_label, constants.WHITE)
     state.screen.blit(t_txt, (t_rect.centerx - t_txt.get_width() // 2, t_rect.centery - t_txt.get_height() // 2))
     y += btn_h + 12
     pygame.draw.line(state.screen, (50, 55, 80), (constants.SIDEBAR_X + pad, y), (constants.SIDEBAR_X + constants.SIDEBAR_WIDTH - pad, y), 1)
@@ -259,23 +292,28 @@ def draw_sidebar():
 
     # --- White Timer (Bottom of Section) ---
     if state.timer_active:
-        w_col = constants.SUCCESS if state.current_turn_color == 'white' else constants.TEXT_DIM
-        w_lbl = font_hint.render("WHITE TIME", True, w_col)
-        w_val = font_timer.render(format_time(state.white_time), True, w_col)
+        w_col = constants.SUCCESS if state.position.turn == 'white' else constants.TEXT_DIM
+        w_lbl = fonts.render('hint', "WHITE TIME", w_col)
+        w_val = fonts.render('timer', format_time(state.white_time), w_col)
         state.screen.blit(w_lbl, (constants.SIDEBAR_X + pad, y))
         state.screen.blit(w_val, (constants.SIDEBAR_X + constants.SIDEBAR_WIDTH - w_val.get_width() - pad, y - 5))
         y += w_lbl.get_height() + 20
 
     # --- Advice Section ---
-    lbl = font_hint.render("COACH ADVICE", True, constants.TEXT_DIM)
+    lbl = fonts.render('hint', "COACH ADVICE", constants.TEXT_DIM)
     state.screen.blit(lbl, (constants.SIDEBAR_X + pad, y))
     y += lbl.get_height() + 6
-    wrapped = wrap_text(state.ai_coach_message, font_small, constants.SIDEBAR_WIDTH - pad * 2)
-    for line in wrapped:
-        if y + font_small.get_height() > constants.WINDOW_H - 10:
+    wrapped = wrap_streaming_text(str(state.ai_coach_message), 'small', constants.SIDEBAR_WIDTH - pad * 2)
+    for i, line in enumerate(wrapped):
+        if y + fonts.get('small').get_height() > constants.WINDOW_H - 10:
             break
-        surf = font_small.render(line, True, constants.TEXT_BRIGHT)
+        surf = fonts.render('small', line, constants.TEXT_BRIGHT)
         state.screen.blit(surf, (constants.SIDEBAR_X + pad, y))
+        if state.ai_coach_streaming and i == len(wrapped) - 1:
+            # Blinking cursor after the newest words while the answer streams in
+            if pygame.time.get_ticks() // CURSOR_BLINK_MS % 2 == 0:
+                cursor = pygame.Rect(constants.SIDEBAR_X + pad + surf.get_width() + 2, y + 2, 7, surf.get_height() - 4)
+                pygame.draw.rect(state.screen, constants.ACCENT, cursor)
         y += surf.get_height() + 3
 
     return {
@@ -285,6 +323,7 @@ def draw_sidebar():
         'presets': preset_rects
     }
 
+@profiling.timed('draw_history_panel')
 def draw_history_panel():
     """Renders the move history log on the rightmost side."""
     hx = constants.HISTORY_X
@@ -293,10 +332,8 @@ def draw_history_panel():
     
     pad = 16
     y = 12
-    font_title = pygame.font.SysFont('Segoe UI', 20, bold=True)
-    font_log   = pygame.font.SysFont('Consolas', 14)
     
-    title = font_title.render("MOVE HISTORY", True, constants.TEXT_DIM)
+    title = fonts.render('history', "MOVE HISTORY", constants.TEXT_DIM)
     state.screen.blit(title, (hx + pad, y))
     y += title.get_height() + 8
     pygame.draw.line(state.screen, (50, 52, 70), (hx + pad, y), (hx + constants.HISTORY_WIDTH - pad, y), 1)
@@ -305,8 +342,124 @@ def draw_history_panel():
     # Show last 30 moves
     log_slice = state.game_move_log[-30:]
     for entry in log_slice:
-        entry_surf = font_log.render(entry, True, constants.TEXT_BRIGHT)
+        entry_surf = fonts.render('log', entry, constants.TEXT_BRIGHT)
         state.screen.blit(entry_surf, (hx + pad, y))
         y += entry_surf.get_height() + 5
         if y > constants.WINDOW_H - 20:
             break
+
+def draw_board_panel():
+    draw_chess_board()
+    draw_all_pieces()
+
+def draw_sidebar_panel():
+    global _sidebar_rects
+    _sidebar_rects = draw_sidebar()
+
+def _sidebar_signature():
+    import ai_interface
+    blink = pygame.time.get_ticks() // CURSOR_BLINK_MS % 2 if state.ai_coach_streaming else None
+    return (state.timer_active, format_time(state.white_time), format_time(state.black_time),
+            state.position.turn, ai_interface.AI_STATUS, str(state.ai_eval_score),
+            state.timer_initial_seconds, state.ai_opponent_enabled,
+            str(state.ai_coach_message), blink)
+
+# name -> (region, signature function, draw function)
+PANELS = {
+    'topbar': (TOPBAR_REGION, lambda: state.current_theme_idx, draw_topbar),
+    'board': (BOARD_REGION,
+              lambda: (state.current_theme_idx, state.position.zobrist_key, state.active_selected_pos,
+                       tuple(state.legal_moves_for_selected)),
+              draw_board_panel),
+    'bottom': (BOTTOM_REGION, lambda: state.last_hint_move, draw_bottom_bar),
+    'sidebar': (pygame.Rect(constants.SIDEBAR_X, 0, constants.SIDEBAR_WIDTH, constants.WINDOW_H),
+                _sidebar_signature, draw_sidebar_panel),
+    'history': (pygame.Rect(constants.HISTORY_X, 0, constants.HISTORY_WIDTH, constants.WINDOW_H),
+                lambda: tuple(state.game_move_log[-30:]), draw_history_panel),
+}
+
+def invalidate(panel=None):
+    """Forces one panel (or all of them) to be redrawn next frame."""
+    if panel is None:
+        _signatures.clear()
+    else:
+        _signatures.pop(panel, None)
+
+def draw_frame():
+    """
+    Redraws the panels whose state changed since they were last drawn.
+    Returns (sidebar button rects, dirty rects for pygame.display.update).
+    """
+    dirty = []
+    for name, (region, signature, draw) in PANELS.items():
+        sig = signature()
+        if name in _signatures and _signatures[name] == sig:
+            continue
+        state.screen.set_clip(region)
+        draw()
+        state.screen.set_clip(None)
+        _signatures[name] = sig
+        dirty.append(region)
+    return _sidebar_rects, dirty
+
+# --- Developer overlay (F3) ---
+DEV_OVERLAY_RECT = pygame.Rect(constants.BOARD_OFFSET_X + 8, constants.BOARD_OFFSET_Y + 8, 360, 330)
+DEV_SECTIONS = ('events', 'ai_move', 'draw_topbar', 'draw_chess_board', 'draw_all_pieces', 'draw_bottom_bar',
+                'draw_sidebar', 'draw_history_panel', 'movegen', 'fen')
+
+def draw_dev_overlay():
+    """
+    Frame-time histogram and per-section timings over the board. Returns
+    the rect it covered; the board panel is redrawn under it every frame.
+    """
+    rect = DEV_OVERLAY_RECT
+    panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+    panel.fill((10, 10, 16, 225))
+    pad = 10
+    line_h = fonts.get('dev').get_height() + 2
+    y = pad
+
+    def text(s, color=constants.TEXT_BRIGHT, x=pad):
+        panel.blit(fonts.render('dev', s, color), (x, y))
+
+    text("DEV OVERLAY  F3 hide  F4 profile", constants.ACCENT)
+    y += line_h
+    text(f"frame p50 {profiling.percentile_ms(50):6.2f} ms  p95 {profiling.percentile_ms(95):6.2f} ms"
+         f"  {profiling.frames_per_second():3d}/s")
+    y += line_h + 4
+
+    # Histogram: one bar per bucket, height relative to the fullest bucket
+    counts = profiling.histogram()
+    labels = [f"<{e}" for e in profiling.HISTOGRAM_EDGES_MS] + [f">{profiling.HISTOGRAM_EDGES_MS[-1]}"]
+    bar_w = (rect.width - pad * 2) // len(counts)
+    bar_h = 60
+    peak = max(counts) or 1
+    for i, count in enumerate(counts):
+        h = bar_h * count // peak
+        color = constants.SUCCESS if i < 5 else (constants.YELLOW if i == 5 else constants.DANGER)
+        pygame.draw.rect(panel, color, (pad + i * bar_w + 2, y + bar_h - h, bar_w - 4, h))
+        label = fonts.render('dev', labels[i], constants.TEXT_DIM)
+        panel.blit(label, (pad + i * bar_w + (bar_w - label.get_width()) // 2, y + bar_h + 2))
+    y += bar_h + line_h + 6
+
+    text(f"{'section':<20}{'ms/frame':>9}{'bg ms/s':>9}", constants.TEXT_DIM)
+    y += line_h
+    averages = profiling.section_averages()
+    background = profiling.background_rates()
+    for name in DEV_SECTIONS:
+        bg = background.get(name)
+        text(f"{name:<20}{averages.get(name, 0.0):>9.3f}{(f'{bg:.1f}' if bg else '-'):>9}")
+        y += line_h
+
+    capture = profiling.capturing()
+    if capture:
+        text(f"profiling... {capture[0]}/{capture[1]} frames", constants.YELLOW)
+        y += line_h
+    elif profiling.last_capture:
+        text(f"saved {os.path.basename(profiling.last_capture)}", constants.TEXT_DIM)
+        y += line_h
+
+    # Only as tall as its contents, which depends on the font
+    used = pygame.Rect(rect.topleft, (rect.width, min(rect.height, y + pad)))
+    state.screen.blit(panel, used.topleft, pygame.Rect((0, 0), used.size))
+    return used
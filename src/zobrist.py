@@ -0,0 +1,89 @@
+"""
+64-bit Zobrist keys for chess positions.
+
+The key is the XOR of one random number per (colour, piece, square), one
+per castling right, one per en passant file and one for black to move.
+Position.make / unmake keep position.zobrist_key up to date by
+XOR-ing only what changed, so the key can be used as a cheap cache key.
+
+Set CHESS_ZOBRIST_DEBUG=1 to check every incremental update against a
+full recompute.
+"""
+import os
+import random
+
+import bitboard
+
+DEBUG = os.getenv("CHESS_ZOBRIST_DEBUG") == "1"
+
+# Fixed seed so keys are stable across runs (they are stored on disk by caches)
+_rng = random.Random(0x5EED_C0DE)
+
+def _rand64():
+    return _rng.getrandbits(64)
+
+PIECE_KEYS = [[[_rand64() for _ in range(64)] for _ in range(6)] for _ in range(2)]
+CASTLING_KEYS = [_rand64() for _ in range(4)]  # WK, WQ, BK, BQ
+EP_FILE_KEYS = [_rand64() for _ in range(8)]
+SIDE_KEY = _rand64()
+
+def piece_key(color, type_name, row, col):
+    """Key contribution of a named piece on a (row, col) cell."""
+    return PIECE_KEYS[bitboard.COLOR_INDEX[color]][bitboard.PIECE_INDEX[type_name]][row * 8 + col]
+
+def castling_key(rights):
+    """Key contribution of a castling-rights bit set (bitboard.CASTLE_* flags)."""
+    key = 0
+    for i in range(4):
+        if rights >> i & 1:
+            key ^= CASTLING_KEYS[i]
+    return key
+
+def ep_key(en_passant_target):
+    """Key contribution of an en passant (row, col) target, or None."""
+    return EP_FILE_KEYS[en_passant_target[1]] if en_passant_target else 0
+
+def compute_key(position):
+    """Full recompute of the key for a BitboardPosition."""
+    key = 0
+    for color in (bitboard.WHITE, bitboard.BLACK):
+        for piece_type, bb in enumerate(position.pieces[color]):
+            table = PIECE_KEYS[color][piece_type]
+            for sq in bitboard.iter_bits(bb):
+                key ^= table[sq]
+    key ^= castling_key(position.castling)
+    if position.ep_square is not None:
+        key ^= EP_FILE_KEYS[position.ep_square & 7]
+    if position.turn == bitboard.BLACK:
+        key ^= SIDE_KEY
+    return key
+
+def move_key_delta(move, ep_before, ep_after, castling_before, castling_after):
+    """
+    XOR delta between the positions before and after a models.MoveRecord.
+    XOR is its own inverse, so undo_move applies the same delta.
+    """
+    start_r, start_c = move.start_pos
+    end_r, end_c = move.end_pos
+    original = move.promoted_from if move.is_promotion else move.piece_moved
+    delta = piece_key(original.color, original.type, start_r, start_c)
+    delta ^= piece_key(move.piece_moved.color, move.piece_moved.type, end_r, end_c)
+    if move.captured_piece:
+        cap_r = start_r if move.is_en_passant else end_r
+        delta ^= piece_key(move.captured_piece.color, move.captured_piece.type, cap_r, end_c)
+    if move.is_castle and move.rook_move[0]:
+        rook, r_start, r_end = move.rook_move
+        delta ^= piece_key(rook.color, 'rook', *r_start) ^ piece_key(rook.color, 'rook', *r_end)
+    delta ^= ep_key(ep_before) ^ ep_key(ep_after)
+    delta ^= castling_key(castling_before) ^ castling_key(castling_after)
+    return delta ^ SIDE_KEY
+
+def key_for_board(board, turn_color, en_passant_target):
+    """Full recompute of the key for a position.board-style grid."""
+    return compute_key(bitboard.BitboardPosition.from_board(board, turn_color, en_passant_target))
+
+def verify(key, board, turn_color, en_passant_target):
+    """Debug check: raises AssertionError if an incremental key has drifted."""
+    expected = key_for_board(board, turn_color, en_passant_target)
+    if key != expected:
+        raise AssertionError(f"Zobrist key drift: incremental {key:016x} != recomputed {expected:016x}")
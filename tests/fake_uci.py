@@ -0,0 +1,54 @@
+"""
+Scripted stand-in for a UCI engine, run as a subprocess by the tests.
+
+FAKE_UCI_MODE picks how 'go' behaves:
+    until_stop  stream info lines until 'stop', then answer 'bestmove'
+    finish      answer 'bestmove' right away; a later 'stop' is ignored (as in UCI)
+"""
+import os
+import sys
+import threading
+import time
+
+MODE = os.getenv("FAKE_UCI_MODE", "until_stop")
+stop = threading.Event()
+out_lock = threading.Lock()
+
+def send(line):
+    with out_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+def search(multipv):
+    depth = 1
+    while MODE == 'until_stop' and not stop.is_set():
+        for rank in range(1, multipv + 1):
+            send(f"info depth {depth} multipv {rank} score cp {20 - rank} nodes 1000 nps 50000 pv e2e4 e7e5")
+        depth += 1
+        time.sleep(0.005)
+    if MODE == 'finish':
+        for rank in range(1, multipv + 1):
+            send(f"info depth 1 multipv {rank} score cp {20 - rank} nodes 10 nps 5000 pv e2e4")
+    send("bestmove e2e4")
+
+def main():
+    multipv = 1
+    for line in sys.stdin:
+        command = line.strip()
+        if command == 'uci':
+            send("id name FakeUCI")
+            send("uciok")
+        elif command == 'isready':
+            send("readyok")
+        elif command.startswith('setoption name MultiPV value'):
+            multipv = int(command.split()[-1])
+        elif command.startswith('go'):
+            stop.clear()
+            threading.Thread(target=search, args=(multipv,), daemon=True).start()
+        elif command == 'stop':
+            stop.set()
+        elif command == 'quit':
+            break
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Coach commentary: caching, coalescing and streaming, run against the
+local fake backend (fake_coach.FakeCoachModel), so no network is needed.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+import ai_agent
+import ai_interface
+import fake_coach
+import fonts
+import result_cache
+import state
+
+FEN = 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+TIMEOUT = 5.0
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """A fast fake coach and an empty commentary cache, as COACH_BACKEND=fake sets up."""
+    monkeypatch.setenv('COACH_BACKEND', 'fake')
+    model = fake_coach.FakeCoachModel(chunk_delay=0.01, first_delay=0.2)
+    monkeypatch.setattr(ai_interface, 'model', model)
+    monkeypatch.setattr(ai_interface, 'coach_cache', result_cache.TieredCache('coach_commentary', capacity=64))
+    return model
+
+class Answers:
+    """Collects callback(text) calls from any thread."""
+    def __init__(self, expected):
+        self.texts = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._expected = expected
+
+    def add(self, text):
+        with self._lock:
+            self.texts.append(text)
+            if len(self.texts) >= self._expected:
+                self._done.set()
+
+    def wait(self):
+        assert self._done.wait(TIMEOUT), f"got {len(self.texts)} of {self._expected} answers"
+        return self.texts
+
+def test_concurrent_identical_requests_make_one_model_call(fake_model):
+    callers = 8
+    answers = Answers(callers)
+    barrier = threading.Barrier(callers)
+
+    def ask():
+        barrier.wait()
+        ai_interface.get_ai_coach_commentary(FEN, 'e7e5', '+0.30', answers.add)
+
+    threads = [threading.Thread(target=ask) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    assert answers.wait() == [fake_coach.ADVICE] * callers
+    assert fake_model.calls == 1
+
+def test_repeat_request_is_served_from_the_cache(fake_model):
+    first = Answers(1)
+    ai_interface.get_ai_coach_commentary(FEN, 'e7e5', '+0.30', first.add)
+    first.wait()
+
+    # Same position and move, and an eval in the same half-pawn bucket
+    again = Answers(1)
+    ai_interface.get_ai_coach_commentary(FEN, 'e7e5', '+0.40', again.add)
+    assert again.texts == [fake_coach.ADVICE]  # Answered synchronously, from the cache
+    assert fake_model.calls == 1
+
+    # A different eval bucket is a different question
+    other = Answers(1)
+    ai_interface.get_ai_coach_commentary(FEN, 'e7e5', '+1.50', other.add)
+    other.wait()
+    assert fake_model.calls == 2
+
+def test_disk_tier_evicts_least_recently_used_past_max_entries(tmp_path, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(result_cache, 'time', types.SimpleNamespace(time=lambda: next(clock)))
+    cache = result_cache.TieredCache('coach_commentary', capacity=2,
+                                     db_path=str(tmp_path / 'coach.db'), max_disk_entries=10)
+
+    def disk_keys():
+        return {row[0] for row in cache._db.execute("SELECT key FROM coach_commentary")}
+
+    for i in range(10):
+        cache.put(f"k{i}", f"advice {i}")
+    assert len(disk_keys()) == 10  # At the limit, nothing evicted yet
+    assert cache.get("k0") == "advice 0"  # A disk hit refreshes k0
+
+    cache.put("k10", "advice 10")
+    keys = disk_keys()
+    assert len(keys) == 9  # Trimmed to 90% of max_disk_entries
+    assert {"k0", "k10"} <= keys
+    assert not {"k1", "k2"} & keys
+
+def test_coach_backend_fake_selects_the_fake_model():
+    env = dict(os.environ, COACH_BACKEND='fake')
+    code = "import ai_interface, fake_coach; assert isinstance(ai_interface.model, fake_coach.FakeCoachModel)"
+    subprocess.run([sys.executable, '-c', code], cwd=SRC, env=env, check=True, capture_output=True)
+
+def test_streamed_advice_reaches_the_sidebar_before_the_final_text(fake_model, monkeypatch):
+    monkeypatch.setattr(state, 'wake_ui', lambda: None)
+    monkeypatch.setattr(state, 'ai_coach_message', "")
+    partials = []
+    shown_at_final = []
+    final = Answers(1)
+
+    def on_partial(text):
+        partials.append(text)
+        ai_agent.stream_coach_text(text)
+
+    def callback(text):
+        shown_at_final.append(state.ai_coach_message)
+        final.add(text)
+
+    ai_interface.get_ai_coach_commentary(FEN, 'e7e5', '+0.30', callback, on_partial=on_partial)
+    assert final.wait() == [fake_coach.ADVICE]
+
+    assert len(partials) > 1
+    for shorter, longer in zip(partials, partials[1:]):
+        assert longer.startswith(shorter) and len(longer) > len(shorter)
+    assert partials[-1] == fake_coach.ADVICE
+    assert state.ai_coach_streaming
+    assert shown_at_final == [partials[-1]]  # The sidebar already had it all
+
+def test_streaming_wrap_matches_a_full_wrap_at_every_step(monkeypatch):
+    import pygame
+    import ui_renderer
+    pygame.font.init()
+    monkeypatch.setattr(ui_renderer, '_coach_wrap', (None, None, "", []))
+    width = 180
+    text = fake_coach.ADVICE
+    # Every few characters, so most steps end in the middle of a word
+    for end in list(range(1, len(text), 7)) + [len(text)]:
+        partial = text[:end]
+        assert ui_renderer.wrap_streaming_text(partial, 'small', width) == \
+            fonts.wrap_text(partial, fonts.get('small'), width), partial
+
+@pytest.mark.parametrize('fen, uci, develops', [
+    ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', 'g1f3', True),
+    ('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1', 'b8c6', True),
+    ('4k3/8/8/8/8/8/8/4K2n b - - 0 1', 'h1g3', False),   # A black knight leaving White's back rank
+    ('4k2B/8/8/8/8/8/8/4K3 w - - 0 1', 'h8e5', False),   # A white bishop leaving Black's back rank
+    ('4k3/8/8/8/2B5/8/8/4K3 w - - 0 1', 'c4f1', False),  # Retreating home is not developing
+])
+def test_only_leaving_your_own_back_rank_develops(fen, uci, develops):
+    import bitboard
+    import coach
+    text = coach._describe_move(bitboard.BitboardPosition.from_fen(fen), bitboard.move_from_uci(uci))
+    assert ('develops' in text) == develops, text
+
+HEDGE_RESULT = {'move': 'e7e5', 'eval': '+0.30', 'pv': ['e7e5', 'g1f3']}
+
+def wait_for_coach():
+    """Waits until no coach request is in flight."""
+    deadline = time.monotonic() + TIMEOUT
+    while ai_interface._coach_inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not ai_interface._coach_inflight
+
+def test_hedged_coach_uses_an_answer_within_budget(fake_model):
+    import coach
+    fake_model.first_delay = 0.05
+    hedged = coach.HedgedCoach(budget=1.0)
+    finals, partials = [], []
+    hedged.request(FEN, HEDGE_RESULT, finals.append, partials.append)
+    wait_for_coach()
+
+    assert finals[0] == coach.explain_locally(FEN, HEDGE_RESULT)  # Local text straight away
+    assert finals[-1] == fake_coach.ADVICE
+    assert partials[-1] == fake_coach.ADVICE
+    metrics = hedged.metrics()
+    assert (metrics['hits'], metrics['misses']) == (1, 0)
+    assert metrics['last_latency'] <= 1.0
+
+def test_hedged_coach_keeps_the_local_text_past_budget(fake_model):
+    import coach
+    fake_model.first_delay = 0.4
+    hedged = coach.HedgedCoach(budget=0.1)
+    finals, partials = [], []
+    hedged.request(FEN, HEDGE_RESULT, finals.append, partials.append)
+    wait_for_coach()
+
+    assert finals == [coach.explain_locally(FEN, HEDGE_RESULT)]  # The late answer was ignored
+    assert partials == []
+    metrics = hedged.metrics()
+    assert (metrics['hits'], metrics['misses']) == (0, 1)
+    assert metrics['last_latency'] > 0.1
@@ -0,0 +1,146 @@
+"""
+Stopping a search must never lose 'bestmove'.
+
+The engine is tests/fake_uci.py run as a real subprocess, driven through a
+wrapper whose _put() does the same isready/readyok round trip as
+python-stockfish's, so a stop sent through _put() would hang these tests.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+import ai_interface
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+TIMEOUT = 5.0
+
+class ScriptedEngine:
+    """The parts of python-stockfish's Stockfish the analysis code uses, over fake_uci.py."""
+    def __init__(self, mode):
+        env = dict(os.environ, FAKE_UCI_MODE=mode)
+        self._stockfish = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, 'fake_uci.py')], env=env,
+            universal_newlines=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def _put(self, command):
+        if command != 'isready':
+            self._is_ready()
+        self._stockfish.stdin.write(f"{command}\n")
+        self._stockfish.stdin.flush()
+
+    def _is_ready(self):
+        self._put('isready')
+        while self._read_line() != 'readyok':
+            pass
+
+    def _read_line(self):
+        return self._stockfish.stdout.readline().strip()
+
+    def set_fen_position(self, fen):
+        self._put(f"position fen {fen}")
+
+    def close(self):
+        self._stockfish.kill()
+        self._stockfish.wait()
+
+def run_with_timeout(fn, *args):
+    """fn(*args) on a thread; fails the test if it has not returned within TIMEOUT."""
+    outcome = {}
+
+    def run():
+        outcome['value'] = fn(*args)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive(), f"{fn.__name__} did not return within {TIMEOUT}s"
+    return outcome['value']
+
+def stop_after(seconds):
+    """A should_stop() that turns true once the given time has passed."""
+    deadline = time.monotonic() + seconds
+
+    def should_stop():
+        if time.monotonic() < deadline:
+            time.sleep(0.01)
+            return False
+        return True
+    return should_stop
+
+def stop_on_first_poll(delay):
+    """A should_stop() that waits (letting the engine finish and 'bestmove' queue up), then says stop."""
+    def should_stop():
+        time.sleep(delay)
+        return True
+    return should_stop
+
+def test_stop_before_bestmove():
+    engine = ScriptedEngine('until_stop')
+    try:
+        result = run_with_timeout(ai_interface._search, engine, START_FEN, 30, stop_after(0.1))
+        assert result['stopped']
+        assert result['move'] == 'e2e4'
+        assert result['depth'] >= 1
+    finally:
+        engine.close()
+
+def test_stop_after_bestmove_is_buffered():
+    engine = ScriptedEngine('finish')
+    try:
+        # By the time should_stop() turns true, 'bestmove' is already waiting in the pipe
+        result = run_with_timeout(ai_interface._search, engine, START_FEN, 30, stop_on_first_poll(0.2))
+        assert result['stopped']
+        assert result['move'] == 'e2e4'
+    finally:
+        engine.close()
+
+def test_engine_is_reusable_after_stop():
+    engine = ScriptedEngine('finish')
+    try:
+        run_with_timeout(ai_interface._search, engine, START_FEN, 30, stop_on_first_poll(0.2))
+        result = run_with_timeout(ai_interface._search, engine, START_FEN, 5)
+        assert not result['stopped']
+        assert result['move'] == 'e2e4'
+    finally:
+        engine.close()
+
+class OneEnginePool:
+    def __init__(self, engine):
+        self.engine = engine
+        self.released = threading.Event()
+
+    def checkout(self, priority):
+        return self.engine
+
+    def release(self, engine):
+        self.released.set()
+
+def test_stopping_pondering_returns_and_frees_the_engine(monkeypatch):
+    import background_analysis
+    engine = ScriptedEngine('until_stop')
+    pool = OneEnginePool(engine)
+    monkeypatch.setattr(ai_interface, 'engines', pool)
+    analyzer = background_analysis.BackgroundAnalyzer(update_interval=60)
+    try:
+        assert analyzer.start(START_FEN, key=None)
+        deadline = time.monotonic() + TIMEOUT
+        while analyzer.latest(None) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert analyzer.latest(None) is not None, "pondering produced no info lines"
+        run_with_timeout(analyzer.stop)
+        assert pool.released.wait(TIMEOUT), "the ponder thread never saw 'bestmove'"
+    finally:
+        engine.close()
+
+def test_single_pv_search_still_lists_its_line():
+    engine = ScriptedEngine('finish')
+    try:
+        result = run_with_timeout(ai_interface._search, engine, START_FEN, 5, None, 1)
+        assert [line['move'] for line in result['lines']] == ['e2e4']
+    finally:
+        engine.close()
@@ -0,0 +1,45 @@
+"""A failed engine search must not be shown as 'Engine Off' while the pool is alive."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import ai_interface
+import analysis_scheduler
+import engine
+import state
+
+TIMEOUT = 5.0
+
+def run_live_eval(monkeypatch, search):
+    """Runs one engine.request_live_eval() with search standing in for analyse_position."""
+    woken = threading.Event()
+    monkeypatch.setattr(state, 'wake_ui', woken.set)
+    monkeypatch.setattr(analysis_scheduler, 'analyse_position', search)
+    engine.request_live_eval()
+    assert woken.wait(TIMEOUT), "the eval callback never ran"
+
+def test_failed_search_keeps_the_last_eval(monkeypatch):
+    monkeypatch.setattr(ai_interface, 'engines', object())
+    monkeypatch.setattr(state, 'ai_eval_score', '+0.31')
+    run_live_eval(monkeypatch, lambda fen, priority, should_stop=None: None)
+    assert state.ai_eval_score == '+0.31'
+
+def test_no_engine_shows_engine_off(monkeypatch):
+    monkeypatch.setattr(ai_interface, 'engines', None)
+    monkeypatch.setattr(state, 'ai_eval_score', '+0.31')
+    run_live_eval(monkeypatch, lambda fen, priority, should_stop=None: None)
+    assert state.ai_eval_score == 'Engine Off'
+
+def test_worker_survives_a_raising_search(monkeypatch):
+    monkeypatch.setattr(ai_interface, 'engines', object())
+    monkeypatch.setattr(state, 'ai_eval_score', '0.0')
+
+    def broken(fen, priority, should_stop=None):
+        raise OSError("engine pipe closed")
+    run_live_eval(monkeypatch, broken)
+    assert state.ai_eval_score == '0.0'
+    # The same worker must still answer the next request
+    run_live_eval(monkeypatch, lambda fen, priority, should_stop=None: {'eval': '+1.20', 'stopped': False})
+    assert state.ai_eval_score == '+1.20'
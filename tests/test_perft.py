@@ -0,0 +1,40 @@
+"""
+Shallow perft counts for the bitboard move generator, walked both with
+BitboardPosition.apply() and through Position.make/unmake.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import bitboard
+import perft
+from position import Position
+
+POSITIONS = ['start', 'kiwipete', 'position3', 'position4', 'position5',
+             'ep-discovered-check', 'ep-pinned-diagonal', 'ep-gives-check',
+             'promote-out-of-check', 'promote-to-check', 'underpromote-to-check', 'castle-gives-check']
+
+CASES = [(name, depth, nodes)
+         for name in POSITIONS
+         for depth, nodes in sorted(perft.REFERENCE_POSITIONS[name][1].items()) if depth <= 3]
+
+@pytest.mark.parametrize('name, depth, nodes', CASES)
+def test_bitboard_perft(name, depth, nodes):
+    fen = perft.REFERENCE_POSITIONS[name][0]
+    assert perft.perft(bitboard.BitboardPosition.from_fen(fen), depth) == nodes
+
+@pytest.mark.parametrize('name, depth, nodes', CASES)
+def test_perft_through_make_unmake(name, depth, nodes):
+    fen = perft.REFERENCE_POSITIONS[name][0]
+    position = Position.from_fen(fen)
+    assert perft.perft_game(position, depth) == nodes
+    assert position.to_fen().split()[:4] == fen.split()[:4]
+
+def test_divide_sums_to_perft():
+    fen = perft.REFERENCE_POSITIONS['kiwipete'][0]
+    counts = perft.divide(bitboard.BitboardPosition.from_fen(fen), 2)
+    assert len(counts) == 48
+    assert sum(counts.values()) == 2039
@@ -0,0 +1,111 @@
+"""
+server.py over real TCP on an ephemeral port, with no engine (the bot
+plays random legal moves) and the fake coach backend.
+"""
+import asyncio
+import json
+import os
+import sys
+from argparse import Namespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import ai_interface
+import loadgen
+import server
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+TIMEOUT = 10.0
+
+@pytest.fixture(autouse=True)
+def no_engine(monkeypatch):
+    monkeypatch.setenv('COACH_BACKEND', 'fake')
+    monkeypatch.setattr(ai_interface, 'engines', None)
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send_line(self, line):
+        self.writer.write((line + '\n').encode())
+        await self.writer.drain()
+        return json.loads(await asyncio.wait_for(self.reader.readline(), TIMEOUT))
+
+    async def call(self, op, **fields):
+        return await self.send_line(json.dumps(dict(fields, op=op)))
+
+def run_against_server(scenario):
+    """Starts serve() on port 0, runs scenario(client) and shuts the server down."""
+    async def main():
+        listening = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(server.serve('127.0.0.1', 0, 1, listening.set_result))
+        port = await asyncio.wait_for(listening, TIMEOUT)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            return await scenario(Client(reader, writer))
+        finally:
+            writer.close()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    return asyncio.run(main())
+
+def test_a_game_against_the_bot():
+    async def scenario(client):
+        game = await client.call('new', bot='black', id=7)
+        assert game['id'] == 7
+        assert game['fen'] == START_FEN and game['turn'] == 'white' and len(game['legal']) == 20
+        game_id = game['game']
+
+        played = await client.call('move', game=game_id, move='e2e4')
+        assert len(played['reply']) in (4, 5)
+        assert played['moves'] == 2 and played['turn'] == 'white'
+        assert (await client.call('legal', game=game_id))['legal'] == played['legal']
+        assert 'illegal move' in (await client.call('move', game=game_id, move='e2e5'))['error']
+
+        undone = await client.call('undo', game=game_id)
+        assert undone['moves'] == 0 and undone['turn'] == 'white' and undone['fen'] == START_FEN
+
+        assert (await client.call('close', game=game_id)) == {'closed': game_id}
+        assert 'unknown game' in (await client.call('state', game=game_id))['error']
+
+        stats = await client.call('stats')
+        assert stats['games_started'] == 1 and stats['games_finished'] == 1
+        assert stats['active_games'] == 0 and stats['moves'] == 1
+        assert stats['engine_fallbacks'] == 1  # No engine: the bot's reply was a random legal move
+    run_against_server(scenario)
+
+def test_bad_requests_get_error_responses():
+    async def scenario(client):
+        assert (await client.call('fly', id=1)) == {'error': 'unknown op: fly', 'id': 1}
+        assert (await client.call('state', game=999))['error'] == 'unknown game: 999'
+        for depth in (None, '8', 0, True):
+            response = await client.call('new', bot='white', depth=depth)
+            assert response['error'].startswith('depth must be a positive integer'), response
+        assert 'bot must be' in (await client.call('new', bot='green'))['error']
+        assert 'error' in await client.send_line('{not json')
+        assert 'error' in await client.send_line('{"game": 1}')  # No op
+        stats = await client.call('stats')
+        assert stats['games_started'] == 0 and stats['active_games'] == 0
+    run_against_server(scenario)
+
+def test_games_belong_to_their_connection():
+    async def scenario(client):
+        game_id = (await client.call('new'))['game']
+        reader, writer = await asyncio.open_connection('127.0.0.1', client.writer.get_extra_info('peername')[1])
+        try:
+            other = Client(reader, writer)
+            assert 'unknown game' in (await other.call('move', game=game_id, move='e2e4'))['error']
+        finally:
+            writer.close()
+        assert (await client.call('move', game=game_id, move='e2e4'))['moves'] == 1
+    run_against_server(scenario)
+
+def test_loadgen_plays_its_games(capsys):
+    args = Namespace(host='127.0.0.1', port=None, clients=4, games=2, max_plies=20, depth=1, seed=3)
+    asyncio.run(asyncio.wait_for(loadgen.run(args), TIMEOUT))
+    out = capsys.readouterr().out
+    assert 'clients 4  games 8' in out
+    assert '"games_finished": 8' in out
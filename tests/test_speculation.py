@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from speculation import ReplySpeculator
+
+def test_lookups_without_speculation_do_not_count():
+    spec = ReplySpeculator()
+    assert spec.take(123, 7) is None
+    assert (spec.hits, spec.misses) == (0, 0)
+
+def test_one_counted_lookup_per_speculated_parent():
+    spec = ReplySpeculator()
+    spec._parent = 7
+    spec._answers = {123: 'e7e5'}
+    assert spec.take(123, 7) == 'e7e5'
+    assert spec.take(456, 7) is None  # Same parent again: not a new speculation
+    assert (spec.hits, spec.misses) == (1, 0)
+
+def test_miss_after_speculation_from_that_parent():
+    spec = ReplySpeculator()
+    spec._parent = 7
+    spec._answers = {123: 'e7e5'}
+    assert spec.take(999, 7) is None
+    assert spec.take(123, 8) == 'e7e5'  # Answer from another parent: used, not counted
+    assert (spec.hits, spec.misses) == (0, 1)
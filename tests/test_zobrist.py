@@ -0,0 +1,65 @@
+"""The incremental Zobrist key must always equal a full recompute."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import bitboard
+import zobrist
+from position import Position
+
+def full_key(position):
+    # Built from the board itself, not Position.snapshot(), which is keyed by the key under test
+    return zobrist.compute_key(bitboard.BitboardPosition.from_board(
+        position.board, position.turn, position.en_passant_target))
+
+def play(position, uci):
+    from_sq, to_sq, promo = bitboard.move_from_uci(uci)
+    position.make(bitboard.cell(from_sq), bitboard.cell(to_sq),
+                  bitboard.PIECE_NAMES[promo] if promo is not None else 'queen')
+
+def test_key_matches_recompute_every_ply_of_random_games():
+    rng = random.Random(7)
+    for _ in range(20):
+        position = Position.initial()
+        keys = [position.zobrist_key]
+        for _ in range(120):
+            moves = position.legal_moves()
+            if not moves:
+                break
+            play(position, bitboard.move_to_uci(rng.choice(moves)))
+            assert position.zobrist_key == full_key(position)
+            keys.append(position.zobrist_key)
+        # ...and unmake() walks back through the same keys
+        while position.history:
+            position.unmake()
+            keys.pop()
+            assert position.zobrist_key == keys[-1] == full_key(position)
+
+def test_special_moves_round_trip():
+    # Castling, en passant and an underpromotion, from a FEN
+    cases = [
+        ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', ['e1g1', 'e8c8']),
+        ('rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 1', ['e5f6', 'e7e5']),
+        ('8/P1k5/K7/8/8/8/8/8 w - - 0 1', ['a7a8n']),
+    ]
+    for fen, moves in cases:
+        position = Position.from_fen(fen)
+        start_key = position.zobrist_key
+        assert start_key == full_key(position)
+        for uci in moves:
+            play(position, uci)
+            assert position.zobrist_key == full_key(position)
+        for _ in moves:
+            position.unmake()
+        assert position.zobrist_key == start_key
+        assert position.to_fen().split()[:4] == fen.split()[:4]
+
+def test_transpositions_share_a_key():
+    a, b = Position.initial(), Position.initial()
+    for uci in ['g1f3', 'g8f6', 'b1c3', 'b8c6']:
+        play(a, uci)
+    for uci in ['b1c3', 'b8c6', 'g1f3', 'g8f6']:
+        play(b, uci)
+    assert a.zobrist_key == b.zobrist_key